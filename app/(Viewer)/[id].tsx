@@ -5,6 +5,7 @@ import { useLocalSearchParams, useRouter } from 'expo-router';
 import { WebView } from 'react-native-webview';
 import { supabase } from '../../src/lib/supabase'; 
 import { DocAssistantPanel } from '../../src/components/DocAssistantPanel';
+import { ltTranslate } from '../../src/lib/translate';
 
 // 🎨 Paleta (la misma que Login/Register)
 const colors = {
@@ -214,6 +215,18 @@ const pdfExtractHTML = useMemo(() => {
   };
 
 
+  // Muestra la traducción según llegan los trozos; el overlay se abre con el primero
+  const showPartialTranslation = (openOverlay: boolean) => {
+    let opened = false;
+    return (partial: string) => {
+      setTranslatedText(partial);
+      if (openOverlay && !opened) {
+        opened = true;
+        setOverlayOpen(true);
+      }
+    };
+  };
+
   // 👉 handler del botón Translate: traduce si hace falta y abre el overlay
   const onPressTranslate = async () => {
     try {
@@ -243,11 +256,18 @@ const pdfExtractHTML = useMemo(() => {
       }
 
       setTranslating(true);
-      const out = await ltTranslate({ text: plain, to: targetLang });
+      const out = await ltTranslate({
+        text: plain,
+        to: targetLang,
+        onChunk: showPartialTranslation(true),
+      });
       setTranslatedText(out);
       setTranslatedForLang(targetLang);
       setOverlayOpen(true);
     } catch (e: any) {
+      // no dejar a la vista una traducción a medias
+      setTranslatedText(null);
+      setTranslatedForLang(null);
       Alert.alert('Translate error', e?.message ?? 'Failed to translate');
     } finally {
       setTranslating(false);
@@ -292,11 +312,17 @@ const onPdfWVMessage = async (evt: any) => {
       if (pdfPendingTarget) {
         try {
           setTranslating(true);
-          const out = await ltTranslate({ text: data.text || '', to: pdfPendingTarget });
+          const out = await ltTranslate({
+            text: data.text || '',
+            to: pdfPendingTarget,
+            onChunk: showPartialTranslation(pdfAutoOpenOverlay),
+          });
           setTranslatedText(out);
           setTranslatedForLang(pdfPendingTarget);
           if (pdfAutoOpenOverlay) setOverlayOpen(true);
         } catch (e: any) {
+          setTranslatedText(null);
+          setTranslatedForLang(null);
           Alert.alert('Translate error', e?.message ?? 'Failed to translate');
         } finally {
           setTranslating(false);
@@ -336,11 +362,17 @@ const translatePdfNow = async (opts?: { to?: string; autoOpenOverlay?: boolean }
 
     // Si ya hay texto extraído, traduce directo
     setTranslating(true);
-    const out = await ltTranslate({ text: textContent, to });
+    const out = await ltTranslate({
+      text: textContent,
+      to,
+      onChunk: showPartialTranslation(pdfAutoOpenOverlay),
+    });
     setTranslatedText(out);
     setTranslatedForLang(to);
     if (pdfAutoOpenOverlay) setOverlayOpen(true);
   } catch (e: any) {
+    setTranslatedText(null);
+    setTranslatedForLang(null);
     Alert.alert('PDF translate', e?.message ?? 'Unexpected error');
   } finally {
     setTranslating(false);
@@ -626,8 +658,8 @@ const translatePdfNow = async (opts?: { to?: string; autoOpenOverlay?: boolean }
               </Text>
             </ScrollView>
 
-            {/* Botón Guardar copia (solo cuando haya traducción) */}
-            {translatedText && (
+            {/* Botón Guardar copia (solo cuando la traducción está completa) */}
+            {translatedText && !translating && (
               <View style={{ paddingHorizontal: 16, paddingBottom: 14, alignItems: 'center' }}>
                 <TouchableOpacity
                   style={[s.translateBtn, { backgroundColor: colors.primary, minWidth: 160 }]}
@@ -666,7 +698,10 @@ const translatePdfNow = async (opts?: { to?: string; autoOpenOverlay?: boolean }
 
             <View style={{ flex: 1, padding: 12 }}>
               {/* Aquí usamos el texto del documento como contexto */}
-              <DocAssistantPanel contextText={contextForAssistant} />
+              <DocAssistantPanel
+                contextText={contextForAssistant}
+                sourceUrl={isPDF ? signedUrl ?? undefined : undefined}
+              />
             </View>
           </View>
         </KeyboardAvoidingView>
@@ -689,104 +724,6 @@ const translatePdfNow = async (opts?: { to?: string; autoOpenOverlay?: boolean }
   );
 }
 
-// 🔧 Helper interno para traducir por chunks usando LT_URL y LT_API_KEY del .env
-// 🔧 Reemplazo drop-in de ltTranslate con chunking robusto y soporte JSON
-async function ltTranslate({
-  text, to, from = 'auto',
-}: { text: string; to: string; from?: string }) {
-  const base = process.env.EXPO_PUBLIC_LT_URL!;
-  const apiKey = process.env.EXPO_PUBLIC_LT_API_KEY!;
-  if (!base || !apiKey) {
-    throw new Error('Missing LT URL or API key. Set EXPO_PUBLIC_LT_URL and EXPO_PUBLIC_LT_API_KEY');
-  }
-
-  // 1) Si parece JSON, lo “pretty-print” para introducir saltos de línea y facilitar el chunking
-  const normalized = normalizeTextForChunks(text);
-
-  // 2) Troceo robusto (doble \n → \n → cortes duros por longitud)
-  const chunks = smartChunks(normalized, 1200);
-
-  const out: string[] = [];
-  for (const c of chunks) {
-    if (!c.trim()) continue;
-    const body = new URLSearchParams();
-    body.set('q', c);
-    body.set('source', from);
-    body.set('target', to);
-    body.set('format', 'text'); // para JSON plano también usamos 'text'
-    body.set('api_key', apiKey);
-
-    const r = await fetch(`${base}/translate`, {
-      method: 'POST',
-      headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
-      body: body.toString(),
-    });
-    if (!r.ok) {
-      const msg = await r.text().catch(() => '');
-      throw new Error(`LibreTranslate ${r.status} ${msg}`);
-    }
-    const data = await r.json();
-    out.push(data?.translatedText ?? '');
-  }
-  return out.join('\n\n');
-}
-
-// Detecta JSON y lo formatea con indentación si es posible.
-function normalizeTextForChunks(input: string): string {
-  const trimmed = String(input ?? '').trim();
-  if (!trimmed) return '';
-  try {
-    const looksJson =
-      (trimmed.startsWith('{') && trimmed.endsWith('}')) ||
-      (trimmed.startsWith('[') && trimmed.endsWith(']'));
-    if (looksJson) {
-      const obj = JSON.parse(trimmed);
-      return JSON.stringify(obj, null, 2); // inserta saltos de línea
-    }
-  } catch {
-    // si no parsea, seguimos con el texto tal cual
-  }
-  return trimmed;
-}
-
-// Parte por párrafos dobles, luego por líneas, y si aún excede, corta por longitud fija.
-function smartChunks(input: string, max = 1200): string[] {
-  const first = input.split(/\n{2,}/g);
-  const chunks: string[] = [];
-  for (const block of first) {
-    if (block.length <= max) { chunks.push(block); continue; }
-
-    // dividir por líneas
-    const lines = block.split(/\n/g);
-    let box = '';
-    for (const ln of lines) {
-      const cand = box ? box + '\n' + ln : ln;
-      if (cand.length > max) {
-        if (box) chunks.push(box);
-        if (ln.length > max) {
-          // corte duro dentro de la línea
-          chunks.push(...chunkByLength(ln, max));
-          box = '';
-        } else {
-          box = ln;
-        }
-      } else {
-        box = cand;
-      }
-    }
-    if (box) chunks.push(box);
-  }
-  return chunks;
-}
-
-function chunkByLength(s: string, max: number): string[] {
-  const out: string[] = [];
-  for (let i = 0; i < s.length; i += max) {
-    out.push(s.slice(i, i + max));
-  }
-  return out;
-}
-
 const styles = (c: typeof colors) => StyleSheet.create({
   safe: { flex: 1, backgroundColor: c.bg },
   header: {
@@ -0,0 +1,293 @@
+# backend/pdf_tools/admission.py
+"""
+Control de admisión para los jobs de traducción.
+
+Antes de extraer nada se estima el coste del job (páginas, caracteres y
+memoria) abriendo el PDF y muestreando el texto de unas pocas páginas. Con
+esa estimación el AdmissionController decide:
+
+  - rechazar el job si excede los límites por job (413),
+  - ejecutarlo ya si cabe en el presupuesto global en vuelo,
+  - o encolarlo hasta que quepa (429 si la cola está llena, 503 si espera
+    demasiado).
+
+Hay dos carriles: los jobs pequeños se admiten siempre antes que los grandes
+y los grandes tienen además un límite propio de concurrencia, para que un
+PDF de 1.500 páginas no deje esperando a todos los demás.
+
+Los endpoints síncronos de FastAPI esperan en la cola ocupando un hilo del
+threadpool (40 por defecto). Por eso el servidor pasa su presupuesto de hilos
+(worker_threads): reserve_slot() rechaza con 429 en cuanto hay tantas
+peticiones pesadas en vuelo (descargando, en cola o ejecutándose), y la cola
+se recorta para que nunca supere esos hilos. Así siempre quedan hilos libres
+para /health, estado y descargas.
+
+Configuración (variables de entorno):
+    ADMISSION_MAX_JOBS          jobs en ejecución a la vez (default: 2 x CPUs)
+    ADMISSION_MAX_CHARS         caracteres en vuelo entre todos los jobs (default 2.000.000)
+    ADMISSION_MAX_MEMORY_MB     memoria estimada en vuelo (default 1024)
+    ADMISSION_MAX_JOB_PAGES     páginas máximas por job (default 1000)
+    ADMISSION_MAX_JOB_CHARS     caracteres máximos por job (default 5.000.000)
+    ADMISSION_SMALL_JOB_CHARS   umbral del carril rápido (default 50.000)
+    ADMISSION_MAX_LARGE_JOBS    jobs grandes a la vez (default 1)
+    ADMISSION_MAX_QUEUE         jobs esperando como máximo (default 50)
+    ADMISSION_QUEUE_TIMEOUT_S   espera máxima en cola (default 120)
+    ADMISSION_MAX_PENDING       peticiones pesadas en vuelo (default: hilos del servidor
+                                menos los reservados; sin límite fuera del servidor)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, Optional
+
+import fitz  # PyMuPDF
+
+# Coeficientes de la estimación de memoria (medidos a ojo con PDFs reales):
+# el documento abierto dos veces (origen + salida) más el layout en Python.
+_MEMORY_MB_PER_FILE_MB = 3.0
+_MEMORY_MB_PER_PAGE = 0.25
+_MEMORY_BYTES_PER_CHAR = 40
+
+
+@dataclass
+class JobCost:
+    pages: int
+    chars: int
+    memory_mb: float
+    languages: int = 1
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[int] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def estimate_job_cost(
+    pdf_path: str,
+    max_pages: int | None = None,
+    languages: int = 1,
+    sample_pages: int = 5,
+) -> JobCost:
+    """
+    Estimación barata del coste: cuenta páginas y extrapola los caracteres
+    a partir de unas pocas páginas repartidas por el documento.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        pages = doc.page_count
+        if isinstance(max_pages, int) and max_pages > 0:
+            pages = min(pages, max_pages)
+
+        if pages == 0:
+            chars = 0
+        else:
+            n = min(sample_pages, pages)
+            step = pages / n
+            sampled = [int(i * step) for i in range(n)]
+            sample_chars = sum(len(doc[i].get_text("text")) for i in sampled)
+            chars = int(sample_chars * pages / n)
+    finally:
+        doc.close()
+
+    file_mb = Path(pdf_path).stat().st_size / (1024 * 1024)
+    memory_mb = (
+        file_mb * _MEMORY_MB_PER_FILE_MB
+        + pages * _MEMORY_MB_PER_PAGE
+        + chars * languages * _MEMORY_BYTES_PER_CHAR / (1024 * 1024)
+    )
+    return JobCost(pages=pages, chars=chars * languages, memory_mb=memory_mb, languages=languages)
+
+
+class _Ticket:
+    __slots__ = ("cost", "large")
+
+    def __init__(self, cost: JobCost, large: bool):
+        self.cost = cost
+        self.large = large
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_jobs: int,
+        max_chars: int,
+        max_memory_mb: float,
+        max_job_pages: int,
+        max_job_chars: int,
+        small_job_chars: int,
+        max_large_jobs: int,
+        max_queue: int,
+        queue_timeout_s: float,
+        max_pending: Optional[int] = None,
+    ):
+        self.max_jobs = max_jobs
+        self.max_chars = max_chars
+        self.max_memory_mb = max_memory_mb
+        self.max_job_pages = max_job_pages
+        self.max_job_chars = max_job_chars
+        self.small_job_chars = small_job_chars
+        self.max_large_jobs = max_large_jobs
+        self.max_queue = max_queue
+        self.queue_timeout_s = queue_timeout_s
+        self.max_pending = max_pending
+
+        self._cond = threading.Condition()
+        self._small_q: Deque[_Ticket] = deque()
+        self._large_q: Deque[_Ticket] = deque()
+        self._running = 0
+        self._running_large = 0
+        self._chars = 0
+        self._memory_mb = 0.0
+        self._pending = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls, worker_threads: Optional[int] = None) -> "AdmissionController":
+        """
+        worker_threads: hilos que pueden ocupar las peticiones pesadas. Con él,
+        los jobs en ejecución y la cola se recortan para caber en esos hilos.
+        """
+
+        def _int(name: str, default: int) -> int:
+            return int(os.environ.get(name) or default)
+
+        max_jobs = _int("ADMISSION_MAX_JOBS", 2 * (os.cpu_count() or 1))
+        max_queue = _int("ADMISSION_MAX_QUEUE", 50)
+        max_pending = _int("ADMISSION_MAX_PENDING", 0) or None
+        if worker_threads is not None:
+            max_pending = min(max_pending or worker_threads, worker_threads)
+        if max_pending is not None:
+            max_pending = max(1, max_pending)
+            max_jobs = min(max_jobs, max_pending)
+            # reserve_slot ya limita el total; la cola nunca pasa de los hilos que quedan
+            max_queue = max(1, min(max_queue, max_pending - max_jobs))
+
+        return cls(
+            max_jobs=max_jobs,
+            max_chars=_int("ADMISSION_MAX_CHARS", 2_000_000),
+            max_memory_mb=float(os.environ.get("ADMISSION_MAX_MEMORY_MB") or 1024),
+            max_job_pages=_int("ADMISSION_MAX_JOB_PAGES", 1000),
+            max_job_chars=_int("ADMISSION_MAX_JOB_CHARS", 5_000_000),
+            small_job_chars=_int("ADMISSION_SMALL_JOB_CHARS", 50_000),
+            max_large_jobs=_int("ADMISSION_MAX_LARGE_JOBS", 1),
+            max_queue=max_queue,
+            queue_timeout_s=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_S") or 120),
+            max_pending=max_pending,
+        )
+
+    def _fits(self, ticket: _Ticket) -> bool:
+        if self._running >= self.max_jobs:
+            return False
+
+        if ticket.large:
+            # los pequeños tienen prioridad y los grandes van en orden de llegada
+            if self._small_q or self._large_q[0] is not ticket:
+                return False
+            if self._running_large >= self.max_large_jobs:
+                return False
+        elif self._small_q[0] is not ticket:
+            return False
+
+        if self._running == 0:
+            # un job que por sí solo supera el presupuesto global (pero no los
+            # límites por job) se deja correr cuando no hay nada más en vuelo
+            return True
+        return (
+            self._chars + ticket.cost.chars <= self.max_chars
+            and self._memory_mb + ticket.cost.memory_mb <= self.max_memory_mb
+        )
+
+    def _reject(self, status_code: int, detail: str, retry_after: Optional[int] = None) -> AdmissionRejected:
+        self.rejected += 1
+        return AdmissionRejected(status_code, detail, retry_after)
+
+    def check_job_limits(self, cost: JobCost) -> None:
+        """Rechaza (413) un job que excede los límites por job."""
+        if cost.pages > self.max_job_pages or cost.chars > self.max_job_chars:
+            with self._cond:
+                raise self._reject(
+                    413,
+                    f"Documento demasiado grande: {cost.pages} paginas / ~{cost.chars} caracteres "
+                    f"(max {self.max_job_pages} / {self.max_job_chars}).",
+                )
+
+    @contextmanager
+    def reserve_slot(self) -> Iterator[None]:
+        """
+        Reserva sin esperar un hueco para una petición pesada, antes incluso de
+        descargar el PDF. Si no hay hueco rechaza con 429 al momento.
+        """
+        with self._cond:
+            if self.max_pending is not None and self._pending >= self.max_pending:
+                raise self._reject(429, "Servidor ocupado, intenta más tarde.", retry_after=30)
+            self._pending += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._pending -= 1
+
+    @contextmanager
+    def admit(self, cost: JobCost) -> Iterator[None]:
+        """Bloquea hasta que el job cabe en el presupuesto y lo libera al salir."""
+        self.check_job_limits(cost)
+
+        ticket = _Ticket(cost, large=cost.chars > self.small_job_chars)
+        queue = self._large_q if ticket.large else self._small_q
+        deadline = time.monotonic() + self.queue_timeout_s
+
+        with self._cond:
+            if len(self._small_q) + len(self._large_q) >= self.max_queue:
+                raise self._reject(429, "Demasiados trabajos en cola, intenta más tarde.", retry_after=30)
+
+            queue.append(ticket)
+            try:
+                while not self._fits(ticket):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise self._reject(503, "Tiempo de espera en cola agotado.", retry_after=60)
+                    self._cond.wait(remaining)
+            finally:
+                queue.remove(ticket)
+                # otro waiter puede haber pasado a ser el primero de su cola
+                self._cond.notify_all()
+
+            self._running += 1
+            self._running_large += int(ticket.large)
+            self._chars += cost.chars
+            self._memory_mb += cost.memory_mb
+            self.admitted += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._running_large -= int(ticket.large)
+                self._chars -= cost.chars
+                self._memory_mb -= cost.memory_mb
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "running": self._running,
+                "runningLarge": self._running_large,
+                "queuedSmall": len(self._small_q),
+                "queuedLarge": len(self._large_q),
+                "charsInFlight": self._chars,
+                "memoryMbInFlight": round(self._memory_mb, 1),
+                "pending": self._pending,
+                "maxPending": self.max_pending,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+            }
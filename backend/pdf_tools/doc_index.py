@@ -0,0 +1,148 @@
+# backend/pdf_tools/doc_index.py
+"""
+Índice de recuperación BM25 sobre los bloques de un layout (extract_layout).
+
+Sirve para que el asistente del documento mande a Gemini solo los bloques
+relevantes para la pregunta (con su página y bbox) en lugar del documento
+entero. Es Python puro: no necesita red ni PyMuPDF, basta con un layout.
+
+    index = build_index(layout)
+    hits = index.search("¿qué dice sobre la garantía?", k=5)
+
+Los índices se guardan en memoria por documento (clave = sha256 del PDF),
+con un máximo de DOC_INDEX_MAX_DOCS documentos (LRU).
+"""
+
+import heapq
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Parámetros estándar de BM25
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas, sin tildes, tokens alfanuméricos de 2+ caracteres (o números)."""
+    s = unicodedata.normalize("NFKD", str(text or "").lower())
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    return [t for t in _TOKEN_RE.findall(s) if len(t) > 1 or t.isdigit()]
+
+
+class DocIndex:
+    def __init__(self, units: List[Dict[str, Any]]):
+        """
+        `units` son los bloques indexados:
+        {"page": int, "blockId": str, "bbox": [...], "text": str}
+        """
+        self.units = units
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.lengths: List[int] = []
+
+        for i, unit in enumerate(units):
+            tf = Counter(tokenize(unit["text"]))
+            self.lengths.append(sum(tf.values()))
+            for term, count in tf.items():
+                self.postings.setdefault(term, []).append((i, count))
+
+        n = len(units)
+        self.avg_length = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(plist) + 0.5) / (len(plist) + 0.5))
+            for term, plist in self.postings.items()
+        }
+
+    def search(self, question: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k bloques por puntuación BM25 (solo los que puntúan > 0)."""
+        scores: Dict[int, float] = {}
+        avg = self.avg_length or 1.0
+        for term in set(tokenize(question)):
+            plist = self.postings.get(term)
+            if not plist:
+                continue
+            idf = self.idf[term]
+            for i, tf in plist:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / avg)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [{**self.units[i], "score": round(score, 4)} for i, score in best]
+
+
+def build_index(layout: Dict[str, Any]) -> DocIndex:
+    units: List[Dict[str, Any]] = []
+    for page in layout.get("pages", []):
+        for b in page.get("blocks", []):
+            text = str(b.get("originalText") or "").strip()
+            if not text:
+                continue
+            units.append(
+                {
+                    "page": page.get("pageIndex", 0),
+                    "blockId": b.get("blockId"),
+                    "bbox": b.get("bbox"),
+                    "text": text,
+                }
+            )
+    return DocIndex(units)
+
+
+class DocIndexStore:
+    """Índices en memoria por documento, con expulsión LRU."""
+
+    def __init__(self, max_docs: int):
+        self.max_docs = max_docs
+        self._indexes: "OrderedDict[str, DocIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[DocIndex]:
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+            return index
+
+    def build(self, key: str, layout: Dict[str, Any]) -> Tuple[DocIndex, float]:
+        """Construye (y guarda) el índice; devuelve también los ms que tardó."""
+        t0 = time.perf_counter()
+        index = build_index(layout)
+        build_ms = (time.perf_counter() - t0) * 1000.0
+        with self._lock:
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > self.max_docs:
+                self._indexes.popitem(last=False)
+        return index, build_ms
+
+
+default_store = DocIndexStore(int(os.environ.get("DOC_INDEX_MAX_DOCS") or 200))
+
+
+if __name__ == "__main__":
+    # Modo prueba: buscar en un layout JSON en disco (sin red)
+    import json
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Uso: python doc_index.py <layout.json> <pregunta> [k]")
+        raise SystemExit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        layout = json.load(f)
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+
+    t0 = time.perf_counter()
+    index = build_index(layout)
+    pages = max(1, len(layout.get("pages", [])))
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+    print(f"Indice: {len(index.units)} bloques en {elapsed_ms:.1f} ms ({elapsed_ms / pages:.2f} ms/pagina)")
+    for hit in index.search(sys.argv[2], k=k):
+        print(f"[p{hit['page']} {hit['blockId']} score={hit['score']}] {hit['text'][:120]!r}")
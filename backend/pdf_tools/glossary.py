@@ -0,0 +1,261 @@
+# backend/pdf_tools/glossary.py
+"""
+Glosario y términos "no traducir" para el traductor de layouts.
+
+Formato del fichero (JSON):
+
+    {
+      "version": "2026-10",
+      "caseSensitive": false,
+      "terms": {
+        "Lektia": null,                          -> se deja tal cual
+        "km/h": null,
+        "GPU": "GPU",                            -> traducción fija (todos los idiomas)
+        "machine learning": {"es": "aprendizaje automático"}   -> fija por idioma
+      }
+    }
+
+Todos los términos se compilan en un autómata Aho-Corasick, así que buscar
+miles de términos cuesta lo mismo que recorrer el texto una vez (en vez de un
+re.sub por término). Antes de llamar a LibreTranslate cada coincidencia se
+sustituye por un marcador [G0], [G1]... y después se restaura con su valor.
+
+Los glosarios compilados se guardan en caché por contenido: su .version es
+"<version del fichero>:<hash de los términos>", así que editar los términos sin
+cambiar "version" también invalida la caché (y las traducciones cacheadas en
+LTClient, que usan esa misma clave). "version" queda solo como etiqueta.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tolerante a lo que el traductor suele hacer con los marcadores:
+# espacios añadidos o la letra cambiada de caja ("[ g3 ]").
+_PLACEHOLDER_RE = re.compile(r"\[\s*[Gg]\s*(\d+)\s*\]")
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _fold(text: str) -> str:
+    """lower() que conserva la longitud (necesario para mapear posiciones)."""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class CompiledGlossary:
+    def __init__(self, terms: Dict[str, Any], version: str, case_sensitive: bool = False):
+        self.version = version
+        self.case_sensitive = case_sensitive
+        self.patterns: List[str] = []
+        self.values: List[Any] = []
+
+        # Trie: goto[node] = {char: child}; out[node] = índice del patrón que acaba ahí
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[int] = [-1]
+        self._dict_link: List[int] = [0]  # siguiente nodo por fail con salida
+
+        for term, value in terms.items():
+            if not term:
+                continue
+            key = term if case_sensitive else _fold(term)
+            node = 0
+            for ch in key:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(-1)
+                    self._dict_link.append(0)
+                node = nxt
+            if self._out[node] == -1:
+                self._out[node] = len(self.patterns)
+                self.patterns.append(key)
+                self.values.append(value)
+
+        self._build_links()
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                fail = self._goto[f].get(ch, 0)
+                self._fail[child] = fail if fail != child else 0
+                self._dict_link[child] = fail if self._out[fail] != -1 else self._dict_link[fail]
+                queue.append(child)
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """
+        Coincidencias (inicio, fin, índice_patrón) sin solapes, eligiendo la
+        más a la izquierda y, a igual inicio, la más larga. Solo palabras
+        completas (no encuentra "cm" dentro de "acme"); el límite de palabra
+        se comprueba antes de elegir la más larga, así "New York Timesheet"
+        sigue encontrando "New York" aunque exista "New York Times".
+        """
+        if not self.patterns:
+            return []
+        hay = text if self.case_sensitive else _fold(text)
+        n = len(hay)
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+
+        # mejor coincidencia válida (la más larga) por posición de inicio
+        best_at: Dict[int, Tuple[int, int]] = {}
+        node = 0
+        for i, ch in enumerate(hay):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+
+            hit = node if out[node] != -1 else dict_link[node]
+            while hit:
+                idx = out[hit]
+                end = i + 1
+                pat = self.patterns[idx]
+                start = end - len(pat)
+                hit = dict_link[hit]
+                if _is_word_char(pat[0]) and start > 0 and _is_word_char(hay[start - 1]):
+                    continue
+                if _is_word_char(pat[-1]) and end < n and _is_word_char(hay[end]):
+                    continue
+                prev = best_at.get(start)
+                if prev is None or end > prev[0]:
+                    best_at[start] = (end, idx)
+
+        matches: List[Tuple[int, int, int]] = []
+        last_end = 0
+        for start in sorted(best_at):
+            end, idx = best_at[start]
+            if start < last_end:
+                continue
+            matches.append((start, end, idx))
+            last_end = end
+        return matches
+
+    def replacement_for(self, idx: int, original: str, target_lang: str) -> str:
+        value = self.values[idx]
+        if isinstance(value, dict):
+            value = value.get(target_lang)
+        return value if isinstance(value, str) else original
+
+    def mask(self, text: str, target_lang: str) -> Tuple[str, List[str]]:
+        """
+        Sustituye los términos por marcadores. Devuelve (texto, valores a restaurar).
+        Un "[G0]" que ya viniera en el texto también se enmascara (restaurándose
+        tal cual), para que unmask no lo confunda con un término del glosario.
+        """
+        matches = self.find(text)
+        if not matches:
+            return text, []
+
+        literal = [(m.start(), m.end(), -1) for m in _PLACEHOLDER_RE.finditer(text)]
+        if literal:
+            spans = sorted(literal + matches)
+            matches = []
+            last_end = 0
+            for span in spans:
+                if span[0] >= last_end:
+                    matches.append(span)
+                    last_end = span[1]
+
+        parts: List[str] = []
+        restore: List[str] = []
+        pos = 0
+        for start, end, idx in matches:
+            parts.append(text[pos:start])
+            parts.append(f"[G{len(restore)}]")
+            original = text[start:end]
+            restore.append(original if idx < 0 else self.replacement_for(idx, original, target_lang))
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts), restore
+
+    @staticmethod
+    def unmask(text: str, restore: List[str]) -> str:
+        if not restore:
+            return text
+
+        def _sub(m: "re.Match[str]") -> str:
+            i = int(m.group(1))
+            return restore[i] if i < len(restore) else m.group(0)
+
+        return _PLACEHOLDER_RE.sub(_sub, text)
+
+    @staticmethod
+    def only_placeholders(masked: str) -> bool:
+        """True si tras enmascarar no queda nada que traducir."""
+        return not any(ch.isalpha() for ch in _PLACEHOLDER_RE.sub("", masked))
+
+
+_compiled: Dict[Tuple[str, bool], CompiledGlossary] = {}
+_compiled_lock = threading.Lock()
+_MAX_COMPILED = 16
+
+
+def compile_glossary(terms: Dict[str, Any], version: str | None = None, case_sensitive: bool = False) -> CompiledGlossary:
+    """
+    Compila (o recupera de la caché) un glosario. La clave incluye siempre un
+    hash del contenido; la versión explícita es solo una etiqueta delante
+    ("2026-10:<hash>"), así que cualquier cambio en los términos genera otra
+    entrada aunque no se cambie la versión.
+    """
+    canonical = json.dumps(terms, sort_keys=True, ensure_ascii=False)
+    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+    version = f"{version}:{digest}" if version else f"sha256:{digest}"
+
+    key = (version, case_sensitive)
+    with _compiled_lock:
+        glossary = _compiled.get(key)
+    if glossary is not None:
+        return glossary
+
+    glossary = CompiledGlossary(terms, version, case_sensitive)
+    with _compiled_lock:
+        if len(_compiled) >= _MAX_COMPILED:
+            _compiled.pop(next(iter(_compiled)))
+        _compiled[key] = glossary
+    return glossary
+
+
+_loaded: Dict[str, Tuple[float, CompiledGlossary]] = {}
+
+
+def load_glossary(path: str) -> Optional[CompiledGlossary]:
+    """
+    Lee un glosario JSON del disco y lo compila (cacheado por contenido).
+    El fichero solo se vuelve a leer si cambia su fecha de modificación.
+    """
+    p = Path(path)
+    try:
+        mtime = p.stat().st_mtime
+    except OSError:
+        return None
+
+    with _compiled_lock:
+        cached = _loaded.get(str(p))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    data = json.loads(p.read_text(encoding="utf-8"))
+    glossary = compile_glossary(
+        data.get("terms") or {},
+        version=data.get("version"),
+        case_sensitive=bool(data.get("caseSensitive", False)),
+    )
+    with _compiled_lock:
+        _loaded[str(p)] = (mtime, glossary)
+    return glossary
@@ -0,0 +1,167 @@
+# backend/pdf_tools/layout_cache.py
+"""
+Caché en disco de layouts extraídos, direccionada por contenido.
+
+La extracción solo depende de los bytes del PDF, así que la clave es:
+
+    sha256(pdf) + huella del extractor
+
+La huella incluye el código fuente de pdf_layout_extractor.py (clean_text,
+extract_blocks_from_dict, extract_layout...) y la versión de PyMuPDF, de modo
+que cualquier cambio en la lógica de extracción invalida la caché sola.
+
+Los layouts se guardan con pickle (mucho más rápido de cargar que JSON) y el
+directorio se mantiene por debajo de un tamaño máximo borrando primero las
+entradas usadas hace más tiempo.
+
+Variables de entorno:
+    LAYOUT_CACHE_DIR     carpeta de la caché (default: ./cache/layouts)
+    LAYOUT_CACHE_MAX_MB  tamaño máximo en MB (default: 512; 0 desactiva la caché)
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import fitz  # PyMuPDF
+
+import pdf_layout_extractor
+import profiling
+from pdf_layout_extractor import extract_layout
+
+# Súbelo a mano si cambia algo que afecte a la extracción fuera de
+# pdf_layout_extractor.py (la huella del código ya cubre ese fichero).
+EXTRACTOR_VERSION = "1"
+
+
+def _extractor_fingerprint() -> str:
+    h = hashlib.sha256()
+    h.update(EXTRACTOR_VERSION.encode())
+    h.update(str(fitz.VersionBind).encode())
+    h.update(Path(pdf_layout_extractor.__file__).read_bytes())
+    return h.hexdigest()[:16]
+
+
+EXTRACTOR_FINGERPRINT = _extractor_fingerprint()
+
+
+def sha256_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class LayoutCache:
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path_for(self, pdf_sha256: str) -> Path:
+        return self.cache_dir / f"{pdf_sha256}-{EXTRACTOR_FINGERPRINT}.pkl"
+
+    def load(self, pdf_sha256: str) -> Optional[Dict[str, Any]]:
+        path = self._path_for(pdf_sha256)
+        try:
+            with open(path, "rb") as f:
+                layout = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # entrada corrupta o de otra versión de Python: la descartamos
+            path.unlink(missing_ok=True)
+            return None
+
+        # marcar como usada recientemente (para la expulsión LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return layout
+
+    def store(self, pdf_sha256: str, layout: Dict[str, Any]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path_for(pdf_sha256)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(layout, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Borra las entradas menos usadas hasta quedar por debajo de max_bytes."""
+        with self._lock:
+            entries = []
+            total = 0
+            for p in self.cache_dir.glob("*.pkl"):
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+
+            entries.sort()
+            for _, size, p in entries:
+                if total <= self.max_bytes:
+                    break
+                p.unlink(missing_ok=True)
+                total -= size
+
+    def get_or_extract(
+        self,
+        pdf_path: str,
+        document_id: str | None = None,
+        extract_fn: Callable[[str], Dict[str, Any]] = extract_layout,
+    ) -> Dict[str, Any]:
+        """
+        Devuelve el layout del PDF, extrayéndolo solo si no está en caché.
+        Cada llamada recibe su propia copia (se puede modificar libremente).
+        """
+        prof = profiling.active()
+        t0 = time.perf_counter() if prof else 0.0
+        hit = False
+        if not self.enabled:
+            layout = extract_fn(pdf_path)
+        else:
+            digest = sha256_file(pdf_path)
+            layout = self.load(digest)
+            if layout is None:
+                layout = extract_fn(pdf_path)
+                self.store(digest, layout)
+            else:
+                hit = True
+                print(f"Layout en cache ({digest[:12]}), se omite la extraccion.")
+        if prof:
+            prof.record("layout", time.perf_counter() - t0, cacheHit=hit)
+
+        if document_id is None:
+            document_id = Path(pdf_path).stem + "-" + uuid.uuid4().hex[:8]
+        layout["documentId"] = document_id
+        return layout
+
+
+_default_cache = LayoutCache(
+    os.environ.get("LAYOUT_CACHE_DIR") or str(Path(__file__).parent / "cache" / "layouts"),
+    int(float(os.environ.get("LAYOUT_CACHE_MAX_MB", "512")) * 1024 * 1024),
+)
+
+
+def get_layout_cached(
+    pdf_path: str,
+    document_id: str | None = None,
+    extract_fn: Callable[[str], Dict[str, Any]] = extract_layout,
+) -> Dict[str, Any]:
+    """Atajo sobre la caché por defecto del proceso."""
+    return _default_cache.get_or_extract(pdf_path, document_id=document_id, extract_fn=extract_fn)
@@ -0,0 +1,289 @@
+# backend/pdf_tools/layout_paragraphs.py
+"""
+Reconstrucción de párrafos sobre un layout (extract_layout).
+
+PyMuPDF parte a menudo un mismo párrafo en varios bloques (un cambio de
+fuente, de interlineado...). Traducidos por separado salen frases cortadas,
+muchas más peticiones a LibreTranslate y bboxes diminutos para el exportador.
+
+merge_paragraph_blocks() une en un solo bloque los bloques que:
+  - están uno debajo del otro en la misma columna (mismo borde izquierdo o
+    mismo centro, para texto centrado),
+  - con un hueco vertical pequeño respecto al tamaño de letra,
+  - y con un tamaño de letra parecido (un título no se pega a su párrafo).
+
+No se unen (se traducirían como una sola frase y luego el texto se repartiría
+mal entre las cajas):
+  - un fragmento que empieza por un marcador de lista (•, -, –, 1., 2)...),
+  - un fragmento tras otro que acaba frase si sus anchos son muy distintos
+    (celdas de tabla apiladas, una línea corta tras el final de un párrafo).
+
+Se hace con un barrido vertical (sort-and-sweep): los bloques se ordenan por
+y0 y se mantiene la lista de párrafos "abiertos" que aún pueden crecer; los que
+quedan demasiado arriba se cierran. Cada página cuesta O(n log n).
+
+El bloque resultante guarda en "sourceBlocks" los bloques originales
+({"blockId", "bbox", "chars"}), y expand_paragraph_blocks() reparte el texto
+traducido entre esos bboxes, proporcionalmente a los caracteres de cada uno,
+para que el exportador pinte en las zonas originales.
+"""
+
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+import profiling
+
+# hueco vertical máximo entre fragmentos, en múltiplos del tamaño de letra
+GAP_FACTOR = 0.8
+# solape vertical tolerado (bboxes de líneas consecutivas se pisan un poco)
+OVERLAP_FACTOR = 0.5
+# diferencia relativa máxima de tamaño de letra
+FONT_SIZE_TOLERANCE = 0.15
+# tolerancia de alineación (borde izquierdo o centro), en múltiplos del tamaño de letra
+ALIGN_FACTOR = 1.0
+# no crear párrafos más largos que un trozo de texto-translate
+MAX_PARAGRAPH_CHARS = 1800
+# tras un final de frase, relación mínima de anchos (estrecho / ancho) para seguir uniendo
+SENTENCE_WIDTH_RATIO = 0.7
+
+# viñetas y numeraciones al principio de un fragmento: "• ", "- ", "– ", "1. ", "2) ", "(3) "
+_LIST_MARKER_RE = re.compile(r"^\s*(?:[•●▪◦‣∙]|(?:[-–—*]|\d{1,3}[.)]|\(\d{1,3}\))(?=\s|$))")
+_SENTENCE_END = (".", "!", "?", ":", ";", "…")
+
+
+def paragraph_merge_enabled() -> bool:
+    """PARAGRAPH_MERGE=0 desactiva la reconstrucción (activada por defecto)."""
+    return os.environ.get("PARAGRAPH_MERGE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class _Paragraph:
+    __slots__ = ("blocks", "x0", "y0", "x1", "y1", "last_x0", "last_x1", "last_text", "font_size", "chars")
+
+    def __init__(self, block: Dict[str, Any], font_size: float):
+        x0, y0, x1, y1 = block["bbox"]
+        self.blocks = [block]
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.last_x0, self.last_x1 = x0, x1
+        self.last_text = str(block.get("originalText") or "")
+        self.font_size = font_size
+        self.chars = len(self.last_text)
+
+    def accepts(self, block: Dict[str, Any], font_size: Optional[float]) -> bool:
+        if font_size is None:
+            return False
+        if abs(font_size - self.font_size) > FONT_SIZE_TOLERANCE * max(font_size, self.font_size):
+            return False
+        if self.chars + len(block.get("originalText") or "") > MAX_PARAGRAPH_CHARS:
+            return False
+
+        x0, y0, x1, _ = block["bbox"]
+        gap = y0 - self.y1
+        if gap > GAP_FACTOR * self.font_size or gap < -OVERLAP_FACTOR * self.font_size:
+            return False
+
+        tol = ALIGN_FACTOR * self.font_size
+        same_left = abs(x0 - self.last_x0) <= tol
+        same_center = abs((x0 + x1) - (self.last_x0 + self.last_x1)) / 2 <= tol
+        if not (same_left or same_center):
+            return False
+
+        # un elemento de lista nuevo no continúa el anterior
+        text = str(block.get("originalText") or "")
+        if _LIST_MARKER_RE.match(text):
+            return False
+
+        # tras un final de frase, anchos muy distintos = otra celda u otro párrafo
+        if self.last_text.rstrip().endswith(_SENTENCE_END):
+            widths = sorted((max(x1 - x0, 0.0), max(self.last_x1 - self.last_x0, 0.0)))
+            if widths[1] > 0 and widths[0] / widths[1] < SENTENCE_WIDTH_RATIO:
+                return False
+        return True
+
+    def add(self, block: Dict[str, Any]) -> None:
+        x0, y0, x1, y1 = block["bbox"]
+        self.blocks.append(block)
+        self.x0, self.y0 = min(self.x0, x0), min(self.y0, y0)
+        self.x1, self.y1 = max(self.x1, x1), max(self.y1, y1)
+        self.last_x0, self.last_x1 = x0, x1
+        self.last_text = str(block.get("originalText") or "")
+        self.chars += len(self.last_text)
+
+
+def _join_fragments(texts: List[str]) -> str:
+    """
+    Une los fragmentos de un párrafo en una sola línea lógica (el exportador
+    vuelve a partir líneas al ancho de cada bbox). Como clean_text, una palabra
+    cortada con guion al final de línea se vuelve a unir.
+    """
+    out = ""
+    for t in texts:
+        for line in t.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            if not out:
+                out = line
+            elif out.endswith("-"):
+                out = out[:-1] + line
+            else:
+                out += " " + line
+    return out
+
+
+def _merge_page_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    order = {id(b): i for i, b in enumerate(blocks)}
+    paragraphs: List[_Paragraph] = []
+    active: List[_Paragraph] = []
+
+    for block in sorted(blocks, key=lambda b: (b["bbox"][1], b["bbox"][0])):
+        x0, y0, x1, _ = block["bbox"]
+        font_size = block.get("fontSize")
+
+        # cerrar los párrafos que ya quedan demasiado lejos por arriba
+        active = [p for p in active if y0 - p.y1 <= GAP_FACTOR * p.font_size]
+
+        best: Optional[_Paragraph] = None
+        for p in active:
+            if p.accepts(block, font_size) and (best is None or p.y1 > best.y1):
+                best = p
+
+        if best is not None:
+            best.add(block)
+            continue
+
+        # un bloque que no se une corta los párrafos abiertos de su columna:
+        # así solo se unen fragmentos consecutivos
+        active = [p for p in active if x1 <= p.x0 or x0 >= p.x1]
+        if font_size is not None:
+            p = _Paragraph(block, float(font_size))
+            paragraphs.append(p)
+            active.append(p)
+        else:
+            paragraphs.append(_Paragraph(block, 0.0))
+
+    # devolver en el orden de lectura original (el del primer fragmento)
+    paragraphs.sort(key=lambda p: min(order[id(b)] for b in p.blocks))
+
+    out: List[Dict[str, Any]] = []
+    for p in paragraphs:
+        if len(p.blocks) == 1:
+            out.append(p.blocks[0])
+            continue
+        # dentro del párrafo, los fragmentos van de arriba abajo
+        texts = [str(b.get("originalText") or "") for b in p.blocks]
+        out.append(
+            {
+                "blockId": p.blocks[0]["blockId"],
+                "bbox": [p.x0, p.y0, p.x1, p.y1],
+                "originalText": _join_fragments(texts),
+                "translatedText": None,
+                "fontSize": p.font_size,
+                "sourceBlocks": [
+                    {"blockId": b["blockId"], "bbox": b["bbox"], "chars": len(t)}
+                    for b, t in zip(p.blocks, texts)
+                ],
+            }
+        )
+    return out
+
+
+def merge_paragraph_blocks(layout: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Une los bloques fragmentados de cada página en párrafos (modifica el
+    layout y lo devuelve). Los bloques sin "fontSize" (layouts antiguos) se
+    dejan como están.
+    """
+    prof = profiling.active()
+    t0 = time.perf_counter()
+    before = after = 0
+    for page in layout.get("pages", []):
+        blocks = page.get("blocks", [])
+        before += len(blocks)
+        page["blocks"] = _merge_page_blocks(blocks)
+        after += len(page["blocks"])
+
+    elapsed = time.perf_counter() - t0
+    if prof:
+        prof.record("paragraphs", elapsed, blocksBefore=before, blocksAfter=after)
+    print(f"Parrafos: {before} bloques -> {after} ({elapsed * 1000:.1f} ms)")
+    return layout
+
+
+def split_proportional(text: str, weights: List[int]) -> List[str]:
+    """
+    Parte el texto en len(weights) trozos, cortando solo entre palabras, de
+    forma que cada trozo tenga aproximadamente su parte proporcional de los
+    caracteres. Mientras haya palabras suficientes ningún trozo queda vacío.
+    """
+    n = len(weights)
+    if n <= 1:
+        return [text]
+
+    words = text.split()
+    w = [max(1, int(x)) for x in weights]
+    total_w = sum(w)
+    total_len = sum(len(word) + 1 for word in words)
+
+    parts: List[List[str]] = [[] for _ in range(n)]
+    i = 0
+    acc = 0.0
+    bound = total_len * w[0] / total_w
+    for k, word in enumerate(words):
+        step = len(word) + 1
+        remaining_words = len(words) - k
+        # pasar a la siguiente caja si la actual ya está llena (cortando por el
+        # punto más cercano) o si hacen falta las palabras restantes para no
+        # dejar cajas vacías
+        while i < n - 1 and parts[i] and (acc + step / 2 > bound or remaining_words <= n - 1 - i):
+            i += 1
+            bound += total_len * w[i] / total_w
+        parts[i].append(word)
+        acc += step
+
+    return [" ".join(p) for p in parts]
+
+
+def expand_paragraph_blocks(blocks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Sustituye cada párrafo reconstruido por sus bloques originales, repartiendo
+    el texto (traducido si lo hay) entre ellos. Los demás bloques no cambian.
+    """
+    out: List[Dict[str, Any]] = []
+    for block in blocks:
+        sources = block.get("sourceBlocks")
+        if not sources:
+            out.append(block)
+            continue
+
+        text = block.get("translatedText") or block.get("originalText") or ""
+        parts = split_proportional(str(text), [s.get("chars", 1) for s in sources])
+        for src, part in zip(sources, parts):
+            out.append(
+                {
+                    "blockId": src["blockId"],
+                    "bbox": src["bbox"],
+                    "originalText": "",
+                    "translatedText": part,
+                    "fontSize": block.get("fontSize"),
+                }
+            )
+    return out
+
+
+if __name__ == "__main__":
+    # Modo prueba: reconstruir párrafos de un layout JSON en disco
+    import json
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Uso: python layout_paragraphs.py <input_layout.json> <output_layout.json>")
+        raise SystemExit(1)
+
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        layout = json.load(f)
+    merge_paragraph_blocks(layout)
+    with open(sys.argv[2], "w", encoding="utf-8") as f:
+        json.dump(layout, f, ensure_ascii=False, indent=2)
+    print(f"✅ Layout con parrafos guardado en {sys.argv[2]}")
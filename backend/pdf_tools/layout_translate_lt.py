@@ -1,10 +1,18 @@
+import contextvars
+import copy
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import requests
 import re
 
+import profiling
+from glossary import CompiledGlossary, load_glossary
+
 def basic_cleanup(text: str) -> str:
     """
     Limpieza MUY suave del texto antes de traducir:
@@ -36,14 +44,32 @@ def save_layout(data: Dict[str, Any], path: str) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def lt_translate(text: str, source: str, target: str, base_url: str, api_key: str) -> str:
+def lt_translate(
+    text: str,
+    source: str,
+    target: str,
+    base_url: str,
+    api_key: str,
+    session: Optional[requests.Session] = None,
+    glossary: Optional[CompiledGlossary] = None,
+) -> str:
     """
     Traduce un bloque de texto usando una API tipo LibreTranslate.
     Aplica una limpieza suave antes de enviar el texto.
+    Si se pasa una session se reutilizan sus conexiones (keep-alive).
+    Con glossary, los términos del glosario se protegen con marcadores
+    antes de traducir y se restauran (o sustituyen) después.
     """
+    restore: list = []
+    if glossary is not None:
+        text, restore = glossary.mask(text, target)
+
     text = basic_cleanup(text)  # 👈 aquí limpiamos
     if not text.strip():
         return ""
+    if restore and CompiledGlossary.only_placeholders(text):
+        # todo el bloque son términos del glosario: no hace falta LibreTranslate
+        return CompiledGlossary.unmask(text, restore)
 
     body = {
         "q": text,
@@ -53,11 +79,66 @@ def lt_translate(text: str, source: str, target: str, base_url: str, api_key: st
         "api_key": api_key,
     }
 
-    r = requests.post(f"{base_url.rstrip('/')}/translate", data=body, timeout=60)
+    http = session or requests
+    prof = profiling.active()
+    t0 = time.perf_counter() if prof else 0.0
+    r = http.post(f"{base_url.rstrip('/')}/translate", data=body, timeout=60)
+    if prof:
+        prof.record_lt(time.perf_counter() - t0, len(text), r.ok)
     if not r.ok:
         raise RuntimeError(f"LT error {r.status_code}: {r.text[:200]}")
     data = r.json()
-    return data.get("translatedText", "")
+    return CompiledGlossary.unmask(data.get("translatedText", ""), restore)
+
+
+class LTClient:
+    """
+    Cliente LibreTranslate pensado para procesos largos (pipeline, servidor):
+
+    - Reutiliza una única requests.Session (conexiones keep-alive).
+    - Mantiene una caché compartida (source, target, glosario, texto) ->
+      traducción que sirve para todos los documentos que pasen por el
+      mismo cliente.
+
+    Es seguro usarlo desde varios hilos a la vez.
+    """
+
+    def __init__(self, base_url: str, api_key: str, max_cache_entries: int = 200_000):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.max_cache_entries = max_cache_entries
+        self.session = requests.Session()
+        self._cache: Dict[Tuple[str, str, Optional[str], str], str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def translate(self, text: str, source: str, target: str, glossary: Optional[CompiledGlossary] = None) -> str:
+        key = (source, target, glossary.version if glossary else None, text)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        translated = lt_translate(
+            text, source, target, self.base_url, self.api_key, session=self.session, glossary=glossary
+        )
+
+        with self._lock:
+            if len(self._cache) >= self.max_cache_entries:
+                # caché llena: la vaciamos entera, es más barato que un LRU real
+                self._cache.clear()
+            self._cache[key] = translated
+        return translated
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        self.session.close()
 
 
 def translate_layout_with_lt(
@@ -66,12 +147,17 @@ def translate_layout_with_lt(
     target_lang: str,
     base_url: str,
     api_key: str,
+    client: Optional[LTClient] = None,
+    glossary: Optional[CompiledGlossary] = None,
 ) -> Dict[str, Any]:
     """
     Recorre todos los bloques del layout y rellena translatedText
     usando LibreTranslate (o compatible).
 
     Usa una caché interna para no traducir dos veces el mismo texto.
+    Si se pasa un LTClient, se usan su sesión y su caché compartida
+    (útil al traducir muchos documentos en el mismo proceso).
+    Si se pasa un glosario, sus términos se respetan (ver glossary.py).
     """
     cache: Dict[str, str] = {}
     pages = layout.get("pages", [])
@@ -96,8 +182,11 @@ def translate_layout_with_lt(
             # caché para texto repetido
             if text in cache:
                 translated = cache[text]
+            elif client is not None:
+                translated = client.translate(text, source_lang, target_lang, glossary)
+                cache[text] = translated
             else:
-                translated = lt_translate(text, source_lang, target_lang, base_url, api_key)
+                translated = lt_translate(text, source_lang, target_lang, base_url, api_key, glossary=glossary)
                 cache[text] = translated
 
             b["translatedText"] = translated
@@ -108,18 +197,180 @@ def translate_layout_with_lt(
     return layout
 
 
+def collect_unique_segments(layout: Dict[str, Any]) -> List[str]:
+    """Textos únicos (sin traducir aún) del layout, en orden de aparición."""
+    seen: Dict[str, None] = {}
+    for page in layout.get("pages", []):
+        for b in page.get("blocks", []):
+            raw_text = b.get("originalText")
+            if raw_text is None:
+                continue
+            text = str(raw_text).strip()
+            if not text:
+                continue
+            existing = b.get("translatedText")
+            if isinstance(existing, str) and existing.strip():
+                continue
+            seen.setdefault(text, None)
+    return list(seen)
+
+
+def translate_layout_multi(
+    layout: Dict[str, Any],
+    source_lang: str,
+    target_langs: List[str],
+    base_url: str,
+    api_key: str,
+    client: Optional[LTClient] = None,
+    glossary: Optional[CompiledGlossary] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Traduce el mismo layout a varios idiomas a partir de una sola extracción.
+
+    Los segmentos únicos se calculan una vez y cada idioma se traduce en su
+    propio hilo. Devuelve {target_lang: layout_traducido}; el layout de
+    entrada no se modifica.
+    """
+    segments = collect_unique_segments(layout)
+    own_client = client is None
+    if client is None:
+        client = LTClient(base_url, api_key)
+
+    def _translate_all(target_lang: str) -> Dict[str, str]:
+        return {text: client.translate(text, source_lang, target_lang, glossary) for text in segments}
+
+    langs = list(dict.fromkeys(target_langs))
+    # cada hilo corre en una copia del contexto actual (para que el perfilado siga activo)
+    contexts = [contextvars.copy_context() for _ in langs]
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(langs))) as pool:
+            results_iter = pool.map(lambda ctx, lang: ctx.run(_translate_all, lang), contexts, langs)
+            translations = dict(zip(langs, results_iter))
+    finally:
+        if own_client:
+            client.close()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for target_lang in langs:
+        table = translations[target_lang]
+        layout_tr = copy.deepcopy(layout)
+        for page in layout_tr.get("pages", []):
+            for b in page.get("blocks", []):
+                existing = b.get("translatedText")
+                if isinstance(existing, str) and existing.strip():
+                    continue
+                text = str(b.get("originalText") or "").strip()
+                if text in table:
+                    b["translatedText"] = table[text]
+        results[target_lang] = layout_tr
+        print(f"[{target_lang}] Entradas unicas traducidas: {len(table)}")
+
+    return results
+
+
+def split_text_segments(text: str, max_chars: int = 1800) -> List[Tuple[str, str]]:
+    """
+    Trocea texto plano para LibreTranslate (mismo criterio que la app):
+    párrafos (doble salto) empaquetados hasta max_chars; un párrafo más
+    largo se parte por líneas y, si aún no cabe, con cortes duros.
+
+    Devuelve pares (separador, segmento). El separador es lo que va delante
+    del segmento al unir las traducciones: "" en el primero, "\n\n" entre
+    párrafos, "\n" entre líneas de un mismo párrafo y "" tras un corte duro.
+    """
+    s = str(text or "").replace("\r\n", "\n").replace("\r", "\n")
+    pieces: List[Tuple[str, str]] = []
+    for para in re.split(r"\n{2,}", s):
+        if len(para) <= max_chars:
+            pieces.append(("\n\n", para))
+            continue
+        sep = "\n\n"
+        box = ""
+        for line in para.split("\n"):
+            cand = box + "\n" + line if box else line
+            if len(cand) <= max_chars:
+                box = cand
+                continue
+            if box:
+                pieces.append((sep, box))
+                sep = "\n"
+            if len(line) > max_chars:
+                for i in range(0, len(line), max_chars):
+                    pieces.append((sep, line[i:i + max_chars]))
+                    sep = ""
+                sep = "\n"
+                box = ""
+            else:
+                box = line
+        if box:
+            pieces.append((sep, box))
+
+    # empaquetar párrafos cortos juntos para no hacer una petición por párrafo
+    segments: List[Tuple[str, str]] = []
+    box = ""
+    box_sep = ""
+    pending = ""  # trozos en blanco: no se traducen, pero se conservan en el separador
+    for sep, piece in pieces:
+        if not piece.strip():
+            pending += sep + piece
+            continue
+        sep, pending = pending + sep, ""
+        if not box:
+            box, box_sep = piece, (sep if segments else "")
+            continue
+        cand = box + sep + piece
+        if len(cand) > max_chars:
+            segments.append((box_sep, box))
+            box, box_sep = piece, sep
+        else:
+            box = cand
+    if box:
+        segments.append((box_sep, box))
+    return segments
+
+
+def translate_segments_iter(
+    segments: List[str],
+    source_lang: str,
+    target_lang: str,
+    client: LTClient,
+    max_workers: int = 4,
+    glossary: Optional[CompiledGlossary] = None,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Traduce los segmentos con hasta max_workers peticiones en vuelo y va
+    devolviendo (índice, traducción) EN ORDEN en cuanto cada uno está listo,
+    para poder enviar el primer trozo sin esperar al resto.
+    """
+    window = max(1, max_workers)
+    pool = ThreadPoolExecutor(max_workers=window)
+    try:
+        pending = []
+        next_to_submit = 0
+        for index in range(len(segments)):
+            while next_to_submit < len(segments) and next_to_submit < index + window:
+                seg = segments[next_to_submit]
+                pending.append(pool.submit(client.translate, seg, source_lang, target_lang, glossary))
+                next_to_submit += 1
+            yield index, pending[index].result()
+            pending[index] = None  # liberar el resultado ya enviado
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
 if __name__ == "__main__":
     # Modo prueba: traducir un layout en disco
     import sys
 
     if len(sys.argv) < 5:
-        print("Uso: python layout_translate_lt.py <input_layout.json> <source_lang> <target_lang> <output_layout.json>")
+        print("Uso: python layout_translate_lt.py <input_layout.json> <source_lang> <target_lang> <output_layout.json> [glossary.json]")
         raise SystemExit(1)
 
     input_layout = sys.argv[1]
     source_lang = sys.argv[2]
     target_lang = sys.argv[3]
     output_layout = sys.argv[4]
+    glossary = load_glossary(sys.argv[5]) if len(sys.argv) > 5 else None
 
     base_url = os.environ.get("LT_URL")
     api_key = os.environ.get("LT_API_KEY")
@@ -127,7 +378,11 @@ if __name__ == "__main__":
     if not base_url or not api_key:
         raise SystemExit("❌ Faltan LT_URL o LT_API_KEY")
 
-    layout = load_layout(input_layout)
-    layout_tr = translate_layout_with_lt(layout, source_lang, target_lang, base_url, api_key)
-    save_layout(layout_tr, output_layout)
+    # PDF_PROFILE=1 guarda un perfil junto al JSON de salida
+    with profiling.profile_job(Path(output_layout).stem) as prof:
+        layout = load_layout(input_layout)
+        layout_tr = translate_layout_with_lt(layout, source_lang, target_lang, base_url, api_key, glossary=glossary)
+        save_layout(layout_tr, output_layout)
     print(f"✅ Layout traducido guardado en: {Path(output_layout).resolve()}")
+    if prof:
+        print(f"Perfil guardado en {profiling.save_profile(prof, Path(output_layout).parent)}")
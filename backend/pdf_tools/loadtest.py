@@ -0,0 +1,391 @@
+# backend/pdf_tools/loadtest.py
+"""
+Prueba de carga de server.py contra un LibreTranslate simulado.
+
+Levanta en local:
+  - un stub de LibreTranslate con latencia y tasa de error configurables,
+  - un servidor de ficheros con PDFs sintéticos (pequeños y grandes),
+  - server.py bajo uvicorn (un proceso, como en producción),
+y lanza una mezcla de peticiones concurrentes a /pdf-translate-direct.
+
+Al final informa p50/p95/p99 de latencia, throughput, tasa de errores y la
+memoria (RSS) del servidor a lo largo del tiempo.
+
+Uso:
+    python loadtest.py --requests 200 --concurrency 16 --lt-latency-ms 40 --lt-error-rate 0.01
+    python loadtest.py --server-url http://127.0.0.1:9000 ...   (servidor ya arrancado)
+"""
+
+import argparse
+import functools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import fitz  # PyMuPDF
+import requests
+
+try:
+    import psutil  # opcional: solo para medir memoria fuera de Linux
+except ImportError:
+    psutil = None
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # el default (5) provoca resets bajo carga
+
+
+# ---------------------------------------------------------------------------
+# Stub de LibreTranslate
+# ---------------------------------------------------------------------------
+
+def start_lt_stub(latency_ms: float, jitter_ms: float, error_rate: float) -> ThreadingHTTPServer:
+    """Arranca un /translate falso que devuelve el texto en mayúsculas."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            form = parse_qs(self.rfile.read(length).decode("utf-8"))
+
+            delay = latency_ms + random.uniform(-jitter_ms, jitter_ms)
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+
+            if random.random() < error_rate:
+                body = b'{"error": "stub failure"}'
+                self.send_response(500)
+            else:
+                text = (form.get("q") or [""])[0]
+                body = json.dumps({"translatedText": text.upper()}).encode("utf-8")
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = _Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+# ---------------------------------------------------------------------------
+# PDFs sintéticos
+# ---------------------------------------------------------------------------
+
+def make_pdf(path: Path, num_pages: int, seed: int) -> None:
+    rnd = random.Random(seed)
+    words = "lorem ipsum dolor sit amet traduccion documento pagina bloque texto parrafo".split()
+    doc = fitz.open()
+    for page_index in range(num_pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Documento {seed} - pagina {page_index + 1}", fontsize=16)
+        y = 110
+        for _ in range(8):
+            for _ in range(4):
+                line = " ".join(rnd.choice(words) for _ in range(10))
+                page.insert_text((72, y), line, fontsize=10)
+                y += 13
+            y += 20
+    doc.save(str(path))
+    doc.close()
+
+
+def start_file_server(directory: Path) -> ThreadingHTTPServer:
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    httpd = _Server(("127.0.0.1", 0), functools.partial(Handler, directory=str(directory)))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+# ---------------------------------------------------------------------------
+# Servidor bajo prueba
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(lt_url: str, workdir: Path) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = dict(os.environ)
+    env.update(
+        {
+            "LT_URL": lt_url,
+            "LT_API_KEY": "loadtest",
+            "PDF_OUTPUTS_DIR": str(workdir / "outputs"),
+            "LAYOUT_CACHE_DIR": str(workdir / "layout_cache"),
+        }
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=str(Path(__file__).parent),
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("El servidor terminó antes de arrancar")
+        try:
+            if requests.get(f"{url}/health", timeout=1).ok:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("El servidor no respondió a /health en 30s")
+
+
+def _rss_bytes(pid: int) -> Optional[int]:
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class MemorySampler(threading.Thread):
+    def __init__(self, pid: int, interval: float):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.samples: List[Dict[str, float]] = []
+        self._stop_event = threading.Event()
+        self._t0 = time.perf_counter()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            rss = _rss_bytes(self.pid)
+            if rss is not None:
+                self.samples.append({"t": round(time.perf_counter() - self._t0, 2), "rssMb": round(rss / 1e6, 1)})
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# ---------------------------------------------------------------------------
+# Carga
+# ---------------------------------------------------------------------------
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def build_plan(args, fixtures: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """Genera la lista de peticiones según la mezcla pedida."""
+    kinds = ["small", "large", "repeat"]
+    weights = [args.mix_small, args.mix_large, args.mix_repeat]
+    max_pages_choices = [None if v <= 0 else v for v in args.max_pages]
+    rnd = random.Random(args.seed)
+
+    plan = []
+    unique_counter = {"small": 0, "large": 0}
+    for _ in range(args.requests):
+        kind = rnd.choices(kinds, weights=weights)[0]
+        if kind == "repeat":
+            name = fixtures["repeat"][0]
+        else:
+            # documentos distintos en cada petición (sin caché de layout)
+            pool = fixtures[kind]
+            name = pool[unique_counter[kind] % len(pool)]
+            unique_counter[kind] += 1
+        plan.append({"kind": kind, "file": name, "max_pages": rnd.choice(max_pages_choices)})
+    return plan
+
+
+def run_load(server_url: str, files_url: str, plan: List[Dict[str, Any]], concurrency: int, timeout: float) -> List[Dict[str, Any]]:
+    """
+    Lanza el plan y devuelve una fila por petición. "status" es el código HTTP
+    o, si no hubo respuesta, el nombre de la excepción (error de transporte).
+    """
+    session = requests.Session()
+    # una conexión por petición: tras un 500 no controlado uvicorn cierra el
+    # socket, y reutilizarlo daría ConnectionError en peticiones que ni
+    # llegaron al servidor
+    session.headers["Connection"] = "close"
+
+    def _one(item: Dict[str, Any]) -> Dict[str, Any]:
+        params = {
+            "source_url": f"{files_url}/{item['file']}",
+            "source_lang": "es",
+            "target_lang": "en",
+        }
+        if item["max_pages"]:
+            params["max_pages"] = item["max_pages"]
+        started = time.perf_counter()
+        try:
+            r = session.get(f"{server_url}/pdf-translate-direct", params=params, timeout=timeout)
+            status = r.status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        return {**item, "status": status, "latency": time.perf_counter() - started}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(_one, plan))
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    def _stats(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        lat = [r["latency"] for r in rows if r["status"] == 200]
+        # errores HTTP (el servidor respondió) y de transporte (no hubo respuesta)
+        responses = [r for r in rows if isinstance(r["status"], int)]
+        errors = [r for r in responses if r["status"] != 200]
+        transport = len(rows) - len(responses)
+        return {
+            "requests": len(rows),
+            "errors": len(errors),
+            "errorRate": round(len(errors) / len(responses), 4) if responses else 0.0,
+            "transportErrors": transport,
+            "transportErrorRate": round(transport / len(rows), 4) if rows else 0.0,
+            "p50": round(percentile(lat, 50), 3),
+            "p95": round(percentile(lat, 95), 3),
+            "p99": round(percentile(lat, 99), 3),
+            "max": round(max(lat), 3) if lat else 0.0,
+        }
+
+    by_kind = {}
+    for kind in sorted({r["kind"] for r in results}):
+        by_kind[kind] = _stats([r for r in results if r["kind"] == kind])
+
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+
+    return {
+        "overall": _stats(results),
+        "byKind": by_kind,
+        "statuses": statuses,
+        "wallSeconds": round(wall_seconds, 2),
+        "throughputRps": round(len(results) / wall_seconds, 2) if wall_seconds else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de /pdf-translate-direct con LibreTranslate simulado.")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--lt-latency-ms", type=float, default=30.0)
+    parser.add_argument("--lt-jitter-ms", type=float, default=10.0)
+    parser.add_argument("--lt-error-rate", type=float, default=0.0)
+    parser.add_argument("--small-pages", type=int, default=2)
+    parser.add_argument("--large-pages", type=int, default=40)
+    parser.add_argument("--mix-small", type=float, default=0.6)
+    parser.add_argument("--mix-large", type=float, default=0.1)
+    parser.add_argument("--mix-repeat", type=float, default=0.3)
+    parser.add_argument("--max-pages", type=int, nargs="+", default=[0, 1, 5], help="Valores de max_pages a mezclar (0 = sin límite)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--mem-interval", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--server-url", default=None, help="Usar un servidor ya arrancado (no se mide su memoria)")
+    parser.add_argument("--report", default=None, help="Guardar el informe completo en este JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        fixtures_dir = workdir / "fixtures"
+        fixtures_dir.mkdir()
+
+        # Un fichero distinto por petición "no repetida" para que no haya hits de caché
+        fixtures: Dict[str, List[str]] = {"small": [], "large": [], "repeat": []}
+        n_small = max(1, int(args.requests * args.mix_small) + 1)
+        n_large = max(1, int(args.requests * args.mix_large) + 1)
+        for i in range(n_small):
+            make_pdf(fixtures_dir / f"small_{i}.pdf", args.small_pages, seed=i)
+            fixtures["small"].append(f"small_{i}.pdf")
+        for i in range(n_large):
+            make_pdf(fixtures_dir / f"large_{i}.pdf", args.large_pages, seed=10_000 + i)
+            fixtures["large"].append(f"large_{i}.pdf")
+        make_pdf(fixtures_dir / "repeat.pdf", args.small_pages * 2, seed=99_999)
+        fixtures["repeat"].append("repeat.pdf")
+
+        lt_stub = start_lt_stub(args.lt_latency_ms, args.lt_jitter_ms, args.lt_error_rate)
+        file_server = start_file_server(fixtures_dir)
+        files_url = f"http://127.0.0.1:{file_server.server_port}"
+
+        proc = None
+        sampler = None
+        if args.server_url:
+            server_url = args.server_url.rstrip("/")
+        else:
+            proc, server_url = start_server(f"http://127.0.0.1:{lt_stub.server_port}", workdir)
+            sampler = MemorySampler(proc.pid, args.mem_interval)
+            sampler.start()
+
+        plan = build_plan(args, fixtures)
+        print(f"Lanzando {len(plan)} peticiones con concurrencia {args.concurrency} contra {server_url} ...")
+        try:
+            started = time.perf_counter()
+            results = run_load(server_url, files_url, plan, args.concurrency, args.timeout)
+            wall = time.perf_counter() - started
+        finally:
+            if sampler is not None:
+                sampler.stop()
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=10)
+            lt_stub.shutdown()
+            file_server.shutdown()
+
+    report = summarize(results, wall)
+    if sampler is not None and sampler.samples:
+        rss = [s["rssMb"] for s in sampler.samples]
+        report["serverMemory"] = {
+            "startMb": rss[0],
+            "peakMb": max(rss),
+            "endMb": rss[-1],
+            "samples": sampler.samples,
+        }
+
+    o = report["overall"]
+    print(f"Throughput: {report['throughputRps']} req/s en {report['wallSeconds']}s")
+    print(f"Latencia (s): p50={o['p50']} p95={o['p95']} p99={o['p99']} max={o['max']}")
+    print(f"Errores HTTP: {o['errors']}/{o['requests'] - o['transportErrors']} respuestas ({o['errorRate'] * 100:.1f}%) {report['statuses']}")
+    print(f"Errores de transporte: {o['transportErrors']}/{o['requests']} ({o['transportErrorRate'] * 100:.1f}%)")
+    for kind, st in report["byKind"].items():
+        print(
+            f"  {kind:<7} n={st['requests']:<4} p50={st['p50']} p95={st['p95']} p99={st['p99']} "
+            f"err={st['errors']} transport={st['transportErrors']}"
+        )
+    if "serverMemory" in report:
+        m = report["serverMemory"]
+        print(f"Memoria servidor (MB): inicio={m['startMb']} pico={m['peakMb']} final={m['endMb']}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Informe guardado en: {Path(args.report).resolve()}")
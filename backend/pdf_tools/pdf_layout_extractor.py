@@ -1,9 +1,13 @@
 import fitz  # PyMuPDF
 import json
+import time
 import uuid
+from collections import Counter
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
+import profiling
+
 
 def clean_text(text: str) -> str:
     """
@@ -42,6 +46,8 @@ def extract_blocks_from_dict(page: fitz.Page) -> List[Dict[str, Any]]:
         texts: List[str] = []
         # bbox del bloque: unimos el min/max de todos los spans
         x0, y0, x1, y1 = None, None, None, None
+        # caracteres por tamaño de letra, para quedarnos con el dominante
+        size_chars: Counter = Counter()
 
         for ln in lines:
             spans = ln.get("spans", [])
@@ -51,6 +57,7 @@ def extract_blocks_from_dict(page: fitz.Page) -> List[Dict[str, Any]]:
                 if not s:
                     continue
                 line_str_parts.append(s)
+                size_chars[round(float(sp.get("size", 0.0)), 1)] += len(s)
 
                 # bbox del span
                 bbox = sp.get("bbox")  # [x0,y0,x1,y1]
@@ -86,6 +93,7 @@ def extract_blocks_from_dict(page: fitz.Page) -> List[Dict[str, Any]]:
                 "bbox": [x0, y0, x1, y1],
                 "originalText": cleaned,
                 "translatedText": None,
+                "fontSize": size_chars.most_common(1)[0][0],
             }
         )
         block_index += 1
@@ -118,12 +126,16 @@ def extract_layout(pdf_path: str, document_id: str | None = None) -> Dict[str, A
     pages_data: List[Dict[str, Any]] = []
     total_blocks = 0
     total_chars = 0
+    prof = profiling.active()
 
     for page_index in range(len(doc)):
+        t0 = time.perf_counter() if prof else 0.0
         page = doc[page_index]
         width, height = page.rect.width, page.rect.height
 
         blocks = extract_blocks_from_dict(page)
+        if prof:
+            prof.record("extract_page", time.perf_counter() - t0, page=page_index, blocks=len(blocks))
 
         # stats rápidos para debug
         total_blocks += len(blocks)
@@ -163,6 +175,10 @@ if __name__ == "__main__":
     input_pdf = sys.argv[1]
     output_json = sys.argv[2]
 
-    layout = extract_layout(input_pdf)
-    save_layout_to_json(layout, output_json)
+    # PDF_PROFILE=1 guarda un perfil junto al JSON de salida
+    with profiling.profile_job(Path(output_json).stem) as prof:
+        layout = extract_layout(input_pdf)
+        save_layout_to_json(layout, output_json)
     print(f"✅ Layout v2 guardado en {output_json}")
+    if prof:
+        print(f"Perfil guardado en {profiling.save_profile(prof, Path(output_json).parent)}")
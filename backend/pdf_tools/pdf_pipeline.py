@@ -0,0 +1,308 @@
+# backend/pdf_tools/pdf_pipeline.py
+"""
+Pipeline completo (extraer -> traducir -> exportar) en un solo proceso.
+
+Pensado para lotes grandes (batch nocturno): en vez de encadenar los tres
+scripts con JSON intermedios, cada PDF pasa por las tres etapas en memoria,
+compartiendo un único LTClient (sesión HTTP + caché) entre todos los documentos.
+
+Uso:
+    python pdf_pipeline.py <carpeta_o_manifest> <output_dir> <source_lang> <target_lang>
+        [--workers N] [--max-pages N] [--dump-json] [--profile]
+
+Con --profile (o PDF_PROFILE=1) se guarda un perfil por documento en
+<output_dir>/profiles/.
+
+El manifest es un .txt con una ruta de PDF por línea (líneas vacías y las que
+empiezan por # se ignoran; rutas relativas se resuelven respecto al manifest).
+Las salidas se nombran por el nombre del PDF; si dos PDFs de carpetas distintas
+se llaman igual, se les añade un hash corto de su ruta (informe_3f2a9c1b_es.pdf).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from glossary import CompiledGlossary, load_glossary
+from layout_cache import get_layout_cached
+from layout_paragraphs import merge_paragraph_blocks
+from pdf_layout_extractor import extract_layout, save_layout_to_json
+from layout_translate_lt import LTClient, translate_layout_with_lt
+from profiling import profile_job, profiling_requested, save_profile
+from pdf_translated_exporter_with_images import export_translated_pdf_with_images
+
+# PyMuPDF no es thread-safe: serializamos extracción y exportación y dejamos
+# que lo que de verdad espera (las llamadas a LibreTranslate) corra en paralelo.
+_FITZ_LOCK = threading.Lock()
+
+
+def _extract_locked(pdf_path: str) -> Dict[str, Any]:
+    with _FITZ_LOCK:
+        return extract_layout(pdf_path)
+
+
+def collect_inputs(source: str) -> List[Path]:
+    """Devuelve la lista de PDFs a procesar a partir de una carpeta o un manifest."""
+    src = Path(source)
+    if src.is_dir():
+        return sorted(p for p in src.iterdir() if p.is_file() and p.suffix.lower() == ".pdf")
+
+    inputs: List[Path] = []
+    for line in src.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        p = Path(line)
+        if not p.is_absolute():
+            p = src.parent / p
+        inputs.append(p)
+    # el mismo PDF listado dos veces se procesa una sola vez
+    return list(dict.fromkeys(inputs))
+
+
+def output_names(inputs: List[Path]) -> Dict[Path, str]:
+    """
+    Nombre base de las salidas de cada PDF: su stem, o stem + hash corto de la
+    ruta si hay otro PDF con el mismo stem (si no, se pisarían las salidas).
+    """
+    counts: Dict[str, int] = {}
+    for p in inputs:
+        counts[p.stem.casefold()] = counts.get(p.stem.casefold(), 0) + 1
+
+    names: Dict[Path, str] = {}
+    for p in inputs:
+        if counts[p.stem.casefold()] == 1:
+            names[p] = p.stem
+        else:
+            digest = hashlib.sha1(str(p.resolve()).encode("utf-8")).hexdigest()[:8]
+            names[p] = f"{p.stem}_{digest}"
+    return names
+
+
+def process_document(
+    pdf_path: Path,
+    output_dir: Path,
+    source_lang: str,
+    target_lang: str,
+    client: LTClient,
+    max_pages: Optional[int] = None,
+    dump_json: bool = False,
+    profile: bool = False,
+    glossary: Optional[CompiledGlossary] = None,
+    merge_paragraphs: bool = True,
+    name: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Procesa un PDF de principio a fin. Nunca lanza excepción: los fallos
+    quedan registrados en el resultado para no tumbar el resto del lote.
+    `name` es el nombre base de las salidas (por defecto, el stem del PDF).
+    """
+    name = name or pdf_path.stem
+    with profile_job(name, profile) as prof:
+        result = _process_document(
+            pdf_path,
+            output_dir,
+            name,
+            source_lang,
+            target_lang,
+            client,
+            max_pages,
+            dump_json,
+            glossary,
+            merge_paragraphs,
+        )
+    if prof is not None:
+        result["profile"] = str(save_profile(prof, output_dir / "profiles"))
+    return result
+
+
+def _process_document(
+    pdf_path: Path,
+    output_dir: Path,
+    name: str,
+    source_lang: str,
+    target_lang: str,
+    client: LTClient,
+    max_pages: Optional[int],
+    dump_json: bool,
+    glossary: Optional[CompiledGlossary],
+    merge_paragraphs: bool,
+) -> Dict[str, Any]:
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"input": str(pdf_path), "ok": False}
+    try:
+        layout = get_layout_cached(str(pdf_path), extract_fn=_extract_locked)
+
+        if isinstance(max_pages, int) and max_pages > 0:
+            layout["pages"] = layout.get("pages", [])[:max_pages]
+
+        if merge_paragraphs:
+            merge_paragraph_blocks(layout)
+
+        if dump_json:
+            save_layout_to_json(layout, str(output_dir / f"{name}.layout.json"))
+
+        layout_tr = translate_layout_with_lt(
+            layout,
+            source_lang=source_lang,
+            target_lang=target_lang,
+            base_url=client.base_url,
+            api_key=client.api_key,
+            client=client,
+            glossary=glossary,
+        )
+
+        if dump_json:
+            save_layout_to_json(layout_tr, str(output_dir / f"{name}.{target_lang}.layout.json"))
+
+        output_path = output_dir / f"{name}_{target_lang}.pdf"
+        with _FITZ_LOCK:
+            export_translated_pdf_with_images(str(pdf_path), layout_tr, str(output_path))
+
+        pages = layout_tr.get("pages", [])
+        result.update(
+            {
+                "ok": True,
+                "output": str(output_path),
+                "pages": len(pages),
+                "blocks": sum(len(p.get("blocks", [])) for p in pages),
+            }
+        )
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_pipeline(
+    inputs: List[Path],
+    output_dir: Path,
+    source_lang: str,
+    target_lang: str,
+    base_url: str,
+    api_key: str,
+    workers: int = 4,
+    max_pages: Optional[int] = None,
+    dump_json: bool = False,
+    profile: bool = False,
+    glossary: Optional[CompiledGlossary] = None,
+    merge_paragraphs: bool = True,
+) -> Dict[str, Any]:
+    """Procesa todos los PDFs con como mucho `workers` documentos en vuelo."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    client = LTClient(base_url, api_key)
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    names = output_names(inputs)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [
+                pool.submit(
+                    process_document,
+                    pdf_path,
+                    output_dir,
+                    source_lang,
+                    target_lang,
+                    client,
+                    max_pages,
+                    dump_json,
+                    profile,
+                    glossary,
+                    merge_paragraphs,
+                    names[pdf_path],
+                )
+                for pdf_path in inputs
+            ]
+            for fut in as_completed(futures):
+                res = fut.result()
+                status = "OK " if res["ok"] else "ERR"
+                print(f"[{status}] {res['input']} ({res['seconds']}s)")
+                results.append(res)
+    finally:
+        client.close()
+
+    results.sort(key=lambda r: r["input"])
+    ok = [r for r in results if r["ok"]]
+    return {
+        "sourceLang": source_lang,
+        "targetLang": target_lang,
+        "documents": len(results),
+        "succeeded": len(ok),
+        "failed": len(results) - len(ok),
+        "pages": sum(r.get("pages", 0) for r in ok),
+        "seconds": round(time.perf_counter() - started, 3),
+        "translationCache": client.stats(),
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae, traduce y exporta un lote de PDFs en un solo proceso.")
+    parser.add_argument("source", help="Carpeta con PDFs o manifest .txt (una ruta por línea)")
+    parser.add_argument("output_dir")
+    parser.add_argument("source_lang")
+    parser.add_argument("target_lang")
+    parser.add_argument("--workers", type=int, default=4, help="Documentos en paralelo (default 4)")
+    parser.add_argument("--max-pages", type=int, default=None)
+    parser.add_argument("--dump-json", action="store_true", help="Guardar también los layouts intermedios")
+    parser.add_argument("--profile", action="store_true", help="Guardar un perfil (cProfile + tiempos) por documento")
+    parser.add_argument("--glossary", default=None, help="Glosario JSON de términos fijos / no traducir")
+    parser.add_argument(
+        "--no-merge-paragraphs",
+        action="store_true",
+        help="No unir bloques fragmentados en párrafos antes de traducir",
+    )
+    args = parser.parse_args()
+
+    base_url = os.environ.get("LT_URL")
+    api_key = os.environ.get("LT_API_KEY")
+    if not base_url or not api_key:
+        raise SystemExit("❌ Faltan LT_URL o LT_API_KEY")
+
+    inputs = collect_inputs(args.source)
+    if not inputs:
+        raise SystemExit(f"❌ No se encontraron PDFs en {args.source}")
+
+    glossary = None
+    if args.glossary:
+        glossary = load_glossary(args.glossary)
+        if glossary is None:
+            raise SystemExit(f"❌ No se encontró el glosario {args.glossary}")
+
+    output_dir = Path(args.output_dir)
+    summary = run_pipeline(
+        inputs,
+        output_dir,
+        args.source_lang,
+        args.target_lang,
+        base_url,
+        api_key,
+        workers=args.workers,
+        max_pages=args.max_pages,
+        dump_json=args.dump_json,
+        profile=profiling_requested(args.profile or None),
+        glossary=glossary,
+        merge_paragraphs=not args.no_merge_paragraphs,
+    )
+
+    summary_path = output_dir / "summary.json"
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(
+        f"✅ {summary['succeeded']}/{summary['documents']} documentos, "
+        f"{summary['pages']} paginas en {summary['seconds']}s "
+        f"(cache: {summary['translationCache']})"
+    )
+    print(f"Resumen guardado en: {summary_path.resolve()}")
+    if summary["failed"]:
+        raise SystemExit(2)
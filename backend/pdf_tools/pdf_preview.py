@@ -0,0 +1,270 @@
+# backend/pdf_tools/pdf_preview.py
+"""
+Previsualización de páginas traducidas mientras el PDF completo se genera.
+
+Cada página se traduce, se pinta con el mismo código que el exportador
+(fondo original + draw_translated_blocks) y se rasteriza a una imagen
+pequeña (PNG, o WebP si está Pillow). El render se hace en un pool de
+procesos: PyMuPDF no es thread-safe y así varias páginas se rasterizan a la
+vez sin bloquear el servidor. Mientras los workers pintan la página N, el
+hilo del job ya está traduciendo la N+1, así que la primera página está
+lista enseguida y el resto va apareciendo en orden.
+
+Las imágenes se guardan en disco por job y página (el servidor usa
+outputs/previews como raíz):
+
+    <root_dir>/<job_id>/<página>.png
+
+Variables de entorno:
+    PREVIEW_DPI        resolución de las miniaturas (default 50)
+    PREVIEW_WORKERS    procesos de render (default: CPUs, máx. 4)
+    PREVIEW_MAX_JOBS   jobs que se conservan en disco (default 50)
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from pdf_translated_exporter_with_images import draw_translated_blocks
+
+try:
+    from PIL import Image  # opcional: solo para WebP
+except ImportError:
+    Image = None
+
+PREVIEW_DPI = int(os.environ.get("PREVIEW_DPI") or 50)
+PREVIEW_WORKERS = int(os.environ.get("PREVIEW_WORKERS") or min(4, os.cpu_count() or 1))
+PREVIEW_MAX_JOBS = int(os.environ.get("PREVIEW_MAX_JOBS") or 50)
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+SOURCE_NAME = "source.pdf"
+
+
+def available_formats() -> List[str]:
+    return ["png", "webp"] if Image is not None else ["png"]
+
+
+# --- Render (se ejecuta en los procesos del pool) ---------------------------
+
+# documentos originales abiertos en este proceso (una página tras otra del
+# mismo PDF no vuelve a abrirlo)
+_open_docs: "OrderedDict[str, fitz.Document]" = OrderedDict()
+_MAX_OPEN_DOCS = 4
+_font: Optional[fitz.Font] = None
+
+
+def _open_source(pdf_path: str) -> fitz.Document:
+    doc = _open_docs.get(pdf_path)
+    if doc is None:
+        doc = fitz.open(pdf_path)
+        _open_docs[pdf_path] = doc
+        while len(_open_docs) > _MAX_OPEN_DOCS:
+            _open_docs.popitem(last=False)[1].close()
+    else:
+        _open_docs.move_to_end(pdf_path)
+    return doc
+
+
+def render_page_image(pdf_path: str, page_data: Dict[str, Any], dpi: int = PREVIEW_DPI, fmt: str = "png") -> bytes:
+    """
+    Pinta una página traducida (igual que export_translated_pdf_with_images)
+    y la devuelve rasterizada como PNG/WebP.
+    """
+    global _font
+    if _font is None:
+        _font = fitz.Font("helv")
+
+    orig_doc = _open_source(pdf_path)
+    out_doc = fitz.open()
+    try:
+        out_page = out_doc.new_page(width=page_data.get("width", 595.0), height=page_data.get("height", 842.0))
+        out_page.show_pdf_page(out_page.rect, orig_doc, page_data.get("pageIndex", 0))
+        draw_translated_blocks(out_page, page_data.get("blocks", []), _font)
+        pix = out_page.get_pixmap(dpi=dpi, alpha=False)
+    finally:
+        out_doc.close()
+
+    if fmt == "webp":
+        import io
+
+        buf = io.BytesIO()
+        Image.frombytes("RGB", (pix.width, pix.height), pix.samples).save(buf, format="WEBP", quality=70)
+        return buf.getvalue()
+    return pix.tobytes("png")
+
+
+# --- Jobs (proceso del servidor) ---------------------------------------------
+
+
+class PreviewJob:
+    def __init__(self, job_id: str, job_dir: Path, fmt: str, dpi: int):
+        self.job_id = job_id
+        self.dir = job_dir
+        self.fmt = fmt
+        self.dpi = dpi
+        self.status = "queued"  # queued -> running -> done | error
+        self.pages: Optional[int] = None
+        self.ready: List[int] = []
+        self.error: Optional[str] = None
+        self.started = time.perf_counter()
+        self.first_page_ms: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def source_path(self) -> Path:
+        return self.dir / SOURCE_NAME
+
+    def image_path(self, page: int) -> Path:
+        return self.dir / f"{page}.{self.fmt}"
+
+    def _page_done(self, page: int, data: bytes) -> None:
+        path = self.image_path(page)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.ready.append(page)
+            self.ready.sort()
+            if self.first_page_ms is None:
+                self.first_page_ms = (time.perf_counter() - self.started) * 1000.0
+
+    def fail(self, message: str) -> None:
+        with self._lock:
+            self.status = "error"
+            self.error = message
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "jobId": self.job_id,
+                "status": self.status,
+                "format": self.fmt,
+                "pages": self.pages,
+                "ready": list(self.ready),
+                "firstPageMs": round(self.first_page_ms, 1) if self.first_page_ms is not None else None,
+                "error": self.error,
+            }
+
+
+class PreviewManager:
+    def __init__(self, root_dir: Path, workers: int = PREVIEW_WORKERS, max_jobs: int = PREVIEW_MAX_JOBS):
+        self.root_dir = Path(root_dir)
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, PreviewJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: el servidor tiene hilos y hacer fork con hilos no es seguro
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+            return self._pool
+
+    def close(self) -> None:
+        """
+        Cierra el pool de render: cancela las páginas pendientes y espera a
+        que terminen los procesos (si no, quedan huérfanos al parar el servidor).
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def create(self, job_id: str, fmt: str = "png", dpi: int = PREVIEW_DPI) -> PreviewJob:
+        job_dir = self.root_dir / job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        job = PreviewJob(job_id, job_dir, fmt, dpi)
+        with self._lock:
+            self._jobs[job_id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id: str) -> Optional[PreviewJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find_image(self, job_id: str, page: int) -> Optional[Path]:
+        """Imagen ya renderizada (también de jobs anteriores a un reinicio)."""
+        for fmt in MEDIA_TYPES:
+            path = self.root_dir / job_id / f"{page}.{fmt}"
+            if path.is_file():
+                return path
+        return None
+
+    def _evict(self) -> None:
+        """Borra los jobs terminados más antiguos por encima de max_jobs."""
+        if not self.root_dir.is_dir():
+            return
+        with self._lock:
+            running = {jid for jid, job in self._jobs.items() if job.status in ("queued", "running")}
+        dirs = sorted(
+            (p for p in self.root_dir.iterdir() if p.is_dir() and p.name not in running),
+            key=lambda p: p.stat().st_mtime,
+        )
+        excess = len(dirs) + len(running) - self.max_jobs
+        for p in dirs[: max(0, excess)]:
+            shutil.rmtree(p, ignore_errors=True)
+            with self._lock:
+                self._jobs.pop(p.name, None)
+
+    def render_job(
+        self,
+        job: PreviewJob,
+        layout: Dict[str, Any],
+        translate_page: Callable[[Dict[str, Any]], None],
+    ) -> None:
+        """
+        Traduce y renderiza todas las páginas del layout en orden, dejando cada
+        imagen en disco en cuanto está lista. Bloquea hasta terminar.
+
+        Las imágenes se escriben desde este hilo, en orden, y no en callbacks
+        del future (que pueden correr después de que el job se dé por
+        terminado): así "done" solo se marca con todas las páginas en disco.
+        """
+        pages = layout.get("pages", [])
+        job.pages = len(pages)
+        job.status = "running"
+        pool = self._get_pool()
+        pending: List[Future] = []
+        written = 0
+
+        def _write_ready(block: bool) -> bool:
+            # escribe en orden las páginas ya renderizadas (con block, todas)
+            nonlocal written
+            while pending and (block or pending[0].done()):
+                try:
+                    data = pending.pop(0).result()
+                except Exception as e:
+                    job.fail(f"Pagina {written}: {type(e).__name__}: {e}")
+                    return False
+                job._page_done(written, data)
+                written += 1
+            return True
+
+        try:
+            ok = True
+            for page_data in pages:
+                translate_page(page_data)
+                pending.append(
+                    pool.submit(render_page_image, str(job.source_path), page_data, job.dpi, job.fmt)
+                )
+                ok = _write_ready(block=False)
+                if not ok:
+                    break
+            if ok and _write_ready(block=True):
+                job.status = "done"
+        except Exception as e:
+            job.fail(f"{type(e).__name__}: {e}")
+        finally:
+            for fut in pending:
+                fut.cancel()
@@ -1,9 +1,13 @@
 import json
+import time
 from pathlib import Path
 from typing import Any, Dict, List
 
 import fitz  # PyMuPDF
 
+import profiling
+from layout_paragraphs import expand_paragraph_blocks
+
 
 def load_layout(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
@@ -77,109 +81,163 @@ def wrap_text(
     return lines
 
 
-def export_translated_pdf_with_images(
-    original_pdf_path: str,
-    layout: Dict[str, Any],
-    output_pdf_path: str,
-) -> None:
-    """
-    Crea un PDF traducido conservando las IMÁGENES del original:
+BASE_FONTSIZE = 9.0
+MIN_FONTSIZE = 5.0
+INNER_MARGIN = 1.0  # pequeño margen interno dentro del bbox
 
-    - Importa cada página del PDF original como fondo.
-    - Para cada bloque de texto del layout:
-        * pinta un rectángulo blanco sobre esa zona (para ocultar el texto original),
-        * hace word-wrap del translatedText dentro de ese bbox,
-        * dibuja el texto traducido dentro del rectángulo.
-    """
-    orig_doc = fitz.open(original_pdf_path)
-    out_doc = fitz.open()
-
-    font = fitz.Font("helv")
-    base_fontsize = 9.0
-    min_fontsize = 5.0
-    inner_margin = 1.0  # pequeño margen interno dentro del bbox
 
+def add_background_pages(out_doc: fitz.Document, orig_doc: fitz.Document, layout: Dict[str, Any]) -> None:
+    """Crea una página de salida por página del layout con la página original como fondo."""
     pages = layout.get("pages", [])
-    num_pages_layout = len(pages)
-    num_pages_orig = orig_doc.page_count
-    num_pages = min(num_pages_layout, num_pages_orig)
+    num_pages = min(len(pages), orig_doc.page_count)
+    prof = profiling.active()
 
     for page_index in range(num_pages):
+        t0 = time.perf_counter() if prof else 0.0
         page_data = pages[page_index]
         width = page_data.get("width", 595.0)
         height = page_data.get("height", 842.0)
-        blocks = page_data.get("blocks", [])
 
-        # 1) Crear nueva página y dibujar la página original como fondo
         out_page = out_doc.new_page(width=width, height=height)
         out_page.show_pdf_page(out_page.rect, orig_doc, page_index)
+        if prof:
+            prof.record("background_page", time.perf_counter() - t0, page=page_index)
 
-        # 2) Para cada bloque de texto: tapar texto original y escribir texto traducido
-        for block in blocks:
-            text = get_block_text(block)
-            if not text:
-                continue
 
-            x0, y0, x1, y1 = block["bbox"]
-            # margen interno
-            x0i = x0 + inner_margin
-            y0i = y0 + inner_margin
-            x1i = x1 - inner_margin
-            y1i = y1 - inner_margin
+def build_background_pdf(orig_doc: fitz.Document, layout: Dict[str, Any]) -> bytes:
+    """
+    Igual que add_background_pages pero devuelve el PDF de fondos serializado.
 
-            if x1i <= x0i or y1i <= y0i:
-                # rectángulo degenerado, lo saltamos
-                continue
+    Cuando se exporta el mismo documento a varios idiomas, los fondos (XObjects
+    de las páginas originales) se construyen una sola vez y cada idioma parte
+    de una copia de estos bytes.
+    """
+    out_doc = fitz.open()
+    add_background_pages(out_doc, orig_doc, layout)
+    data = out_doc.tobytes()
+    out_doc.close()
+    return data
 
-            max_width = x1i - x0i
-            max_height = y1i - y0i
 
-            # 2.1) Pintar un rectángulo blanco para tapar el texto original
-            rect = fitz.Rect(x0, y0, x1, y1)
-            out_page.draw_rect(rect, fill=(1, 1, 1), color=None, width=0)
+def draw_translated_blocks(
+    out_page: fitz.Page,
+    blocks: List[Dict[str, Any]],
+    font: fitz.Font,
+    base_fontsize: float = BASE_FONTSIZE,
+    min_fontsize: float = MIN_FONTSIZE,
+    inner_margin: float = INNER_MARGIN,
+) -> None:
+    """
+    Para cada bloque de texto: tapa el texto original con un rectángulo
+    blanco y escribe el texto traducido ajustado a su bbox.
+    Los párrafos reconstruidos (layout_paragraphs) se reparten antes entre
+    los bboxes de sus bloques originales.
+    """
+    for block in expand_paragraph_blocks(blocks):
+        text = get_block_text(block)
+        x0, y0, x1, y1 = block["bbox"]
+        # margen interno
+        x0i = x0 + inner_margin
+        y0i = y0 + inner_margin
+        x1i = x1 - inner_margin
+        y1i = y1 - inner_margin
+
+        if x1i <= x0i or y1i <= y0i:
+            # rectángulo degenerado, lo saltamos
+            continue
 
-            # 2.2) Ajustar tamaño de letra para que el texto traducido quepa
-            fontsize = base_fontsize
-            chosen_lines: List[str] = []
-            chosen_fontsize = fontsize
+        max_width = x1i - x0i
+        max_height = y1i - y0i
+
+        # 2.1) Pintar un rectángulo blanco para tapar el texto original
+        rect = fitz.Rect(x0, y0, x1, y1)
+        out_page.draw_rect(rect, fill=(1, 1, 1), color=None, width=0)
+        if not text:
+            # trozo de párrafo sin palabras que le toquen: solo se tapa
+            continue
+
+        # 2.2) Ajustar tamaño de letra para que el texto traducido quepa
+        fontsize = base_fontsize
+        chosen_lines: List[str] = []
+        chosen_fontsize = fontsize
+
+        while fontsize >= min_fontsize:
+            lines = wrap_text(font, text, max_width, fontsize)
+            line_height = fontsize * 1.2
+            needed_height = len(lines) * line_height
 
-            while fontsize >= min_fontsize:
-                lines = wrap_text(font, text, max_width, fontsize)
-                line_height = fontsize * 1.2
-                needed_height = len(lines) * line_height
-
-                if needed_height <= max_height:
-                    chosen_lines = lines
-                    chosen_fontsize = fontsize
-                    break
-
-                fontsize -= 1.0
-
-            # Si ni con min_fontsize cabe todo, recortamos líneas
-            if not chosen_lines:
-                fontsize = min_fontsize
-                lines = wrap_text(font, text, max_width, fontsize)
-                line_height = fontsize * 1.2
-                max_lines = int(max_height // line_height)
-                if max_lines <= 0:
-                    continue
-                chosen_lines = lines[:max_lines]
+            if needed_height <= max_height:
+                chosen_lines = lines
                 chosen_fontsize = fontsize
+                break
 
-            # 2.3) Dibujar las líneas dentro del bbox
-            line_height = chosen_fontsize * 1.2
-            y = y0i + line_height
-            for line in chosen_lines:
-                if y > y1i:
-                    break
-                if line.strip():
-                    out_page.insert_text(
-                        (x0i, y),
-                        line,
-                        fontsize=chosen_fontsize,
-                        fontname="helv",
-                    )
-                y += line_height
+            fontsize -= 1.0
+
+        # Si ni con min_fontsize cabe todo, recortamos líneas
+        if not chosen_lines:
+            fontsize = min_fontsize
+            lines = wrap_text(font, text, max_width, fontsize)
+            line_height = fontsize * 1.2
+            max_lines = int(max_height // line_height)
+            if max_lines <= 0:
+                continue
+            chosen_lines = lines[:max_lines]
+            chosen_fontsize = fontsize
+
+        # 2.3) Dibujar las líneas dentro del bbox
+        line_height = chosen_fontsize * 1.2
+        y = y0i + line_height
+        for line in chosen_lines:
+            if y > y1i:
+                break
+            if line.strip():
+                out_page.insert_text(
+                    (x0i, y),
+                    line,
+                    fontsize=chosen_fontsize,
+                    fontname="helv",
+                )
+            y += line_height
+
+
+def overlay_translated_layout(out_doc: fitz.Document, layout: Dict[str, Any]) -> None:
+    """Dibuja los bloques traducidos sobre un documento que ya tiene los fondos."""
+    font = fitz.Font("helv")
+    pages = layout.get("pages", [])
+    num_pages = min(len(pages), out_doc.page_count)
+
+    prof = profiling.active()
+
+    for page_index in range(num_pages):
+        t0 = time.perf_counter() if prof else 0.0
+        blocks = pages[page_index].get("blocks", [])
+        draw_translated_blocks(out_doc[page_index], blocks, font)
+        if prof:
+            prof.record("render_page", time.perf_counter() - t0, page=page_index, blocks=len(blocks))
+
+
+def export_translated_pdf_with_images(
+    original_pdf_path: str,
+    layout: Dict[str, Any],
+    output_pdf_path: str,
+) -> None:
+    """
+    Crea un PDF traducido conservando las IMÁGENES del original:
+
+    - Importa cada página del PDF original como fondo.
+    - Para cada bloque de texto del layout:
+        * pinta un rectángulo blanco sobre esa zona (para ocultar el texto original),
+        * hace word-wrap del translatedText dentro de ese bbox,
+        * dibuja el texto traducido dentro del rectángulo.
+    """
+    orig_doc = fitz.open(original_pdf_path)
+    out_doc = fitz.open()
+
+    # 1) Páginas nuevas con la página original como fondo
+    add_background_pages(out_doc, orig_doc, layout)
+
+    # 2) Tapar texto original y escribir texto traducido
+    overlay_translated_layout(out_doc, layout)
 
     output_path = Path(output_pdf_path)
     out_doc.save(output_path)
@@ -188,6 +246,36 @@ def export_translated_pdf_with_images(
     print(f"PDF translated (with images) saved in: {output_path}")
 
 
+def export_translated_pdfs_with_images(
+    original_pdf_path: str,
+    layouts: Dict[str, Dict[str, Any]],
+    output_pdf_paths: Dict[str, str],
+) -> None:
+    """
+    Variante multi-idioma de export_translated_pdf_with_images.
+
+    `layouts` y `output_pdf_paths` van indexados por la misma clave (p.ej. el
+    idioma destino). Todos los layouts deben venir de la misma extracción:
+    el PDF original se abre una sola vez y los fondos se construyen una vez.
+    """
+    if not layouts:
+        return
+
+    orig_doc = fitz.open(original_pdf_path)
+    reference_layout = next(iter(layouts.values()))
+    background = build_background_pdf(orig_doc, reference_layout)
+    orig_doc.close()
+
+    for key, layout in layouts.items():
+        out_doc = fitz.open("pdf", background)
+        overlay_translated_layout(out_doc, layout)
+
+        output_path = Path(output_pdf_paths[key])
+        out_doc.save(output_path)
+        out_doc.close()
+        print(f"PDF translated (with images) saved in: {output_path} [{key}]")
+
+
 if __name__ == "__main__":
     import sys
 
@@ -200,5 +288,9 @@ if __name__ == "__main__":
     layout_json = sys.argv[2]
     output_pdf = sys.argv[3]
 
-    layout = load_layout(layout_json)
-    export_translated_pdf_with_images(original_pdf, layout, output_pdf)
+    # PDF_PROFILE=1 guarda un perfil junto al PDF de salida
+    with profiling.profile_job(Path(output_pdf).stem) as prof:
+        layout = load_layout(layout_json)
+        export_translated_pdf_with_images(original_pdf, layout, output_pdf)
+    if prof:
+        print(f"Perfil guardado en {profiling.save_profile(prof, Path(output_pdf).parent)}")
@@ -0,0 +1,151 @@
+# backend/pdf_tools/profiling.py
+"""
+Perfilado opcional por trabajo (job) de traducción.
+
+Se activa con ?profile=true en los endpoints o con la variable de entorno
+PDF_PROFILE=1 (endpoints y CLIs). Mientras un job está perfilado:
+
+  - se captura un cProfile de toda la ejecución,
+  - las etapas anotan sus tiempos (extracción y render por página,
+    descarga, caché de layout...) con record(),
+  - cada llamada a LibreTranslate anota su latencia con record_lt().
+
+Con el perfilado apagado active() devuelve None y las etapas no hacen nada más.
+Al terminar, save_profile() escribe <job>.json (resumen legible) y
+<job>.pstats (para snakeviz / pstats).
+"""
+
+import contextvars
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class JobProfile:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.started = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.lt_requests: List[Dict[str, Any]] = []
+        self.notes: List[str] = []
+        self.stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float, **meta: Any) -> None:
+        with self._lock:
+            self.events.append({"stage": stage, "seconds": round(seconds, 6), **meta})
+
+    def record_lt(self, seconds: float, chars: int, ok: bool) -> None:
+        with self._lock:
+            self.lt_requests.append({"seconds": round(seconds, 6), "chars": chars, "ok": ok})
+
+    def summary(self) -> Dict[str, Any]:
+        stages: Dict[str, Dict[str, Any]] = {}
+        for ev in self.events:
+            st = stages.setdefault(ev["stage"], {"count": 0, "totalSeconds": 0.0, "maxSeconds": 0.0})
+            st["count"] += 1
+            st["totalSeconds"] += ev["seconds"]
+            st["maxSeconds"] = max(st["maxSeconds"], ev["seconds"])
+        for st in stages.values():
+            st["totalSeconds"] = round(st["totalSeconds"], 6)
+
+        lat = sorted(r["seconds"] for r in self.lt_requests)
+
+        def _pct(p: float) -> float:
+            if not lat:
+                return 0.0
+            return lat[min(len(lat) - 1, int(p / 100.0 * len(lat)))]
+
+        top_functions = ""
+        if self.stats is not None:
+            buf = io.StringIO()
+            self.stats.stream = buf
+            self.stats.sort_stats("cumulative").print_stats(30)
+            top_functions = buf.getvalue()
+
+        return {
+            "jobId": self.job_id,
+            "totalSeconds": self.total_seconds,
+            "stages": stages,
+            "events": self.events,
+            "libreTranslate": {
+                "requests": len(lat),
+                "errors": sum(1 for r in self.lt_requests if not r["ok"]),
+                "totalSeconds": round(sum(lat), 6),
+                "p50": _pct(50),
+                "p95": _pct(95),
+                "max": lat[-1] if lat else 0.0,
+                "chars": sum(r["chars"] for r in self.lt_requests),
+            },
+            "notes": self.notes,
+            "topFunctions": top_functions,
+        }
+
+
+_current: contextvars.ContextVar[Optional[JobProfile]] = contextvars.ContextVar("job_profile", default=None)
+
+
+def active() -> Optional[JobProfile]:
+    """Perfil del job en curso, o None si no se está perfilando."""
+    return _current.get()
+
+
+def profiling_requested(flag: Optional[bool] = None) -> bool:
+    """El flag explícito (query param / --profile) manda; si no, PDF_PROFILE."""
+    if flag is not None:
+        return bool(flag)
+    return os.environ.get("PDF_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+@contextmanager
+def profile_job(job_id: str, enabled: Optional[bool] = None) -> Iterator[Optional[JobProfile]]:
+    """
+    Perfila el bloque si está activado; si no, simplemente cede None.
+
+        with profile_job(job_id, profile) as prof:
+            ...
+        if prof:
+            save_profile(prof, carpeta)
+    """
+    if not profiling_requested(enabled):
+        yield None
+        return
+
+    prof = JobProfile(job_id)
+    token = _current.set(prof)
+    profiler: Optional[cProfile.Profile] = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # solo puede haber un perfilador activo a la vez (p.ej. otro job perfilado)
+        profiler = None
+        prof.notes.append("cProfile no disponible: ya habia otro perfilador activo")
+
+    try:
+        yield prof
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            prof.stats = pstats.Stats(profiler)
+        prof.total_seconds = round(time.perf_counter() - prof.started, 6)
+        _current.reset(token)
+
+
+def save_profile(prof: JobProfile, out_dir: Path) -> Path:
+    """Guarda el resumen (.json) y, si lo hay, el cProfile (.pstats). Devuelve la ruta del .json."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if prof.stats is not None:
+        prof.stats.dump_stats(str(out_dir / f"{prof.job_id}.pstats"))
+
+    json_path = out_dir / f"{prof.job_id}.json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(prof.summary(), f, ensure_ascii=False, indent=2)
+    return json_path
@@ -1,21 +1,86 @@
 # backend/pdf_tools/server.py
 
+import json
 import os
+import re
 import tempfile
+import threading
+import time
 import requests
 import uuid
 import shutil
+import weakref
+from contextlib import ExitStack
 from pathlib import Path
-from fastapi import FastAPI
+from typing import Dict, List, Tuple
+import anyio.to_thread
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 
-from pdf_layout_extractor import extract_layout
-from layout_translate_lt import translate_layout_with_lt
-from pdf_translated_exporter_with_images import export_translated_pdf_with_images
+import profiling
+
+from admission import AdmissionController, AdmissionRejected, JobCost, estimate_job_cost
+from doc_index import DocIndex, default_store as doc_index_store
+from glossary import CompiledGlossary, load_glossary
+from layout_cache import get_layout_cached, sha256_file
+from layout_paragraphs import merge_paragraph_blocks, paragraph_merge_enabled
+from pdf_preview import MEDIA_TYPES, PREVIEW_DPI, PreviewJob, PreviewManager, available_formats
+from profiling import profile_job, save_profile
+from layout_translate_lt import (
+    LTClient,
+    split_text_segments,
+    translate_layout_multi,
+    translate_layout_with_lt,
+    translate_segments_iter,
+)
+from pdf_translated_exporter_with_images import (
+    export_translated_pdf_with_images,
+    export_translated_pdfs_with_images,
+)
 
 app = FastAPI()
 
+OUTPUTS_DIR = Path(os.environ.get("PDF_OUTPUTS_DIR") or Path(__file__).parent / "outputs")
+PROFILES_DIR = OUTPUTS_DIR / "profiles"
+PREVIEWS_DIR = OUTPUTS_DIR / "previews"
+
+_lt_client: LTClient | None = None
+_lt_client_lock = threading.Lock()
+
+# Los endpoints síncronos corren en el threadpool de anyio. Los jobs pesados
+# (descarga + cola + ejecución) pueden ocupar todos los hilos menos los
+# reservados, que quedan para /health, estado y descargas.
+SERVER_WORKER_THREADS = int(os.environ.get("SERVER_WORKER_THREADS") or 40)
+SERVER_RESERVED_THREADS = int(os.environ.get("SERVER_RESERVED_THREADS") or 8)
+
+_admission = AdmissionController.from_env(
+    worker_threads=max(1, SERVER_WORKER_THREADS - SERVER_RESERVED_THREADS)
+)
+
+TEXT_SEGMENT_CHARS = int(os.environ.get("TEXT_TRANSLATE_SEGMENT_CHARS") or 1800)
+TEXT_TRANSLATE_WORKERS = int(os.environ.get("TEXT_TRANSLATE_WORKERS") or 4)
+
+_previews = PreviewManager(PREVIEWS_DIR)
+
+
+@app.on_event("startup")
+async def _configure_threadpool():
+    anyio.to_thread.current_default_thread_limiter().total_tokens = SERVER_WORKER_THREADS
+
+
+@app.on_event("shutdown")
+def _close_previews():
+    _previews.close()
+
+
+@app.exception_handler(AdmissionRejected)
+def _admission_rejected(request, exc: AdmissionRejected):
+    headers = {"Retry-After": str(exc.retry_after)} if exc.retry_after else None
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail}, headers=headers)
+
+
 def _env_from_file() -> dict:
     try:
         root = Path(__file__).resolve().parents[2]
@@ -45,89 +110,544 @@ def _get_any(keys):
             return val
     return None
 
+def _get_lt_client() -> LTClient:
+    """Cliente LibreTranslate compartido por todas las peticiones (sesión + caché)."""
+    global _lt_client
+    base_url = _get_any(["LT_URL", "EXPO_PUBLIC_LT_URL"])  # lee de env o .env
+    api_key = _get_any(["LT_API_KEY", "EXPO_PUBLIC_LT_API_KEY"])  # idem
+    if not base_url or not api_key:
+        raise RuntimeError("Faltan LT_URL o LT_API_KEY")
+
+    with _lt_client_lock:
+        if _lt_client is None or _lt_client.base_url != base_url or _lt_client.api_key != api_key:
+            _lt_client = LTClient(base_url, api_key)
+        return _lt_client
+
+
+def _get_glossary() -> CompiledGlossary | None:
+    """Glosario opcional (GLOSSARY_PATH); se recarga solo si cambia el fichero."""
+    path = _get_any(["GLOSSARY_PATH"])
+    return load_glossary(path) if path else None
+
+
+def _download_pdf(source_url: str, input_path: Path) -> None:
+    prof = profiling.active()
+    t0 = time.perf_counter() if prof else 0.0
+    r = requests.get(source_url, timeout=180)
+    r.raise_for_status()
+    input_path.write_bytes(r.content)
+    if prof:
+        prof.record("download", time.perf_counter() - t0, bytes=len(r.content))
+
+
+def _limit_pages(layout: dict, max_pages: int | None) -> None:
+    if isinstance(max_pages, int) and max_pages > 0:
+        pages = layout.get("pages", [])
+        layout["pages"] = pages[:max_pages]
+
+
+def _merge_paragraphs(layout: dict) -> None:
+    # unir bloques fragmentados en párrafos antes de traducir (PARAGRAPH_MERGE=0 lo desactiva)
+    if paragraph_merge_enabled():
+        merge_paragraph_blocks(layout)
+
+
 class PdfTranslateRequest(BaseModel):
     source_url: str      # signedUrl que ya tienes en el Viewer
     source_lang: str     # ej: "es"
     target_lang: str     # ej: "en"
 
 
-def generate_translated_pdf(source_url: str, source_lang: str, target_lang: str, max_pages: int | None = None) -> str:
+class TextTranslateRequest(BaseModel):
+    text: str
+    target_lang: str
+    source_lang: str = "auto"
+
+
+class DocIndexRequest(BaseModel):
+    source_url: str
+
+
+class DocSearchRequest(BaseModel):
+    question: str
+    document_key: str | None = None  # devuelto por /doc-index
+    source_url: str | None = None    # alternativa: se indexa al vuelo si hace falta
+    k: int = 5
+
+
+class PdfTranslateMultiRequest(BaseModel):
+    source_url: str
+    source_lang: str
+    target_langs: List[str]  # ej: ["en", "fr", "de"]
+
+
+class PdfPreviewRequest(BaseModel):
+    source_url: str
+    source_lang: str
+    target_lang: str
+    format: str = "png"      # "png" o "webp" (requiere Pillow)
+    dpi: int | None = None   # default PREVIEW_DPI
+
+
+def _run_job(job_id: str, profile: bool | None, fn, /, *args, **kwargs):
+    """
+    Ejecuta fn perfilándola si se pidió (?profile=true o PDF_PROFILE=1).
+    El perfil se guarda aunque el job falle, para poder investigar el error.
+    """
+    prof = None
+    try:
+        with profile_job(job_id, profile) as prof:
+            return fn(*args, **kwargs)
+    finally:
+        if prof is not None:
+            save_profile(prof, PROFILES_DIR)
+
+
+def _job_headers(job_id: str, profiled: bool) -> Dict[str, str]:
+    headers = {"X-Job-Id": job_id}
+    if profiled:
+        headers["X-Profile-Url"] = f"/jobs/{job_id}/profile"
+    return headers
+
+
+def generate_translated_pdf(
+    source_url: str,
+    source_lang: str,
+    target_lang: str,
+    max_pages: int | None = None,
+    job_id: str | None = None,
+) -> str:
     """Lógica común para POST y GET: devuelve la ruta del PDF generado."""
-    base_url = _get_any(["LT_URL", "EXPO_PUBLIC_LT_URL"])  # lee de env o .env
-    api_key = _get_any(["LT_API_KEY", "EXPO_PUBLIC_LT_API_KEY"])  # idem
-    if not base_url or not api_key:
-        raise RuntimeError("Faltan LT_URL o LT_API_KEY")
+    job_id = job_id or uuid.uuid4().hex
+    client = _get_lt_client()
 
-    with tempfile.TemporaryDirectory() as tmpdir:
+    # hueco reservado antes de descargar: si el servidor está lleno, 429 al momento
+    with _admission.reserve_slot(), tempfile.TemporaryDirectory() as tmpdir:
         tmpdir = Path(tmpdir)
         input_path = tmpdir / "input.pdf"
         output_path = tmpdir / "output.pdf"
 
         # 1) Descargar el PDF original desde el signedUrl
-        r = requests.get(source_url, timeout=180)
-        r.raise_for_status()
-        input_path.write_bytes(r.content)
-
-        # 2) Extraer layout
-        layout = extract_layout(str(input_path))
-
-        # 2b) Limitar páginas si se solicita (para pruebas o PDFs grandes)
-        if isinstance(max_pages, int) and max_pages > 0:
-            pages = layout.get("pages", [])
-            layout["pages"] = pages[:max_pages]
-
-        # 3) Traducir layout bloque a bloque
-        layout_tr = translate_layout_with_lt(
-            layout,
-            source_lang=source_lang,
-            target_lang=target_lang,
-            base_url=base_url,
-            api_key=api_key,
-        )
-
-        # 4) Exportar PDF traducido conservando imágenes (o positioned si prefieres)
-        export_translated_pdf_with_images(
-            str(input_path),
-            layout_tr,
-            str(output_path),
-        )
-
-        # Copiar a una ruta persistente fuera del tmpdir para servirlo con seguridad
-        persist_dir = Path(__file__).parent / "outputs"
-        persist_dir.mkdir(parents=True, exist_ok=True)
-        persist_path = persist_dir / f"translated_{target_lang}_{uuid.uuid4().hex}.pdf"
-        shutil.copyfile(str(output_path), str(persist_path))
-        return str(persist_path)
+        _download_pdf(source_url, input_path)
+
+        # 1b) Control de admisión: estimar el coste y esperar turno (o rechazar)
+        cost = estimate_job_cost(str(input_path), max_pages=max_pages)
+        with _admission.admit(cost):
+            # 2) Extraer layout (o reutilizarlo de la caché si ya vimos este PDF)
+            layout = get_layout_cached(str(input_path))
+
+            # 2b) Limitar páginas si se solicita (para pruebas o PDFs grandes)
+            _limit_pages(layout, max_pages)
+            _merge_paragraphs(layout)
+
+            # 3) Traducir layout bloque a bloque
+            layout_tr = translate_layout_with_lt(
+                layout,
+                source_lang=source_lang,
+                target_lang=target_lang,
+                base_url=client.base_url,
+                api_key=client.api_key,
+                client=client,
+                glossary=_get_glossary(),
+            )
+
+            # 4) Exportar PDF traducido conservando imágenes (o positioned si prefieres)
+            export_translated_pdf_with_images(
+                str(input_path),
+                layout_tr,
+                str(output_path),
+            )
+
+            # Copiar a una ruta persistente fuera del tmpdir para servirlo con seguridad
+            OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
+            persist_path = OUTPUTS_DIR / f"translated_{target_lang}_{job_id}.pdf"
+            shutil.copyfile(str(output_path), str(persist_path))
+            return str(persist_path)
+
+
+def generate_translated_pdfs(
+    source_url: str,
+    source_lang: str,
+    target_langs: List[str],
+    job_id: str,
+    max_pages: int | None = None,
+) -> Dict[str, str]:
+    """
+    Fan-out multi-idioma: descarga y extrae una sola vez, traduce los
+    segmentos únicos en paralelo por idioma y exporta todos los PDFs
+    reutilizando el documento original. Devuelve {target_lang: ruta}.
+    """
+    client = _get_lt_client()
+
+    with _admission.reserve_slot(), tempfile.TemporaryDirectory() as tmpdir:
+        input_path = Path(tmpdir) / "input.pdf"
+        _download_pdf(source_url, input_path)
+
+        cost = estimate_job_cost(str(input_path), max_pages=max_pages, languages=len(target_langs))
+        with _admission.admit(cost):
+            layout = get_layout_cached(str(input_path))
+            _limit_pages(layout, max_pages)
+            _merge_paragraphs(layout)
+
+            layouts = translate_layout_multi(
+                layout,
+                source_lang=source_lang,
+                target_langs=target_langs,
+                base_url=client.base_url,
+                api_key=client.api_key,
+                client=client,
+                glossary=_get_glossary(),
+            )
+
+            OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
+            output_paths = {
+                lang: str(OUTPUTS_DIR / f"translated_{lang}_{job_id}.pdf")
+                for lang in layouts
+            }
+            export_translated_pdfs_with_images(str(input_path), layouts, output_paths)
+            return output_paths
 
 
 @app.post("/pdf-translate")
-def pdf_translate(req: PdfTranslateRequest, max_pages: int | None = None):
-    pdf_path = generate_translated_pdf(
+def pdf_translate(req: PdfTranslateRequest, max_pages: int | None = None, profile: bool | None = None):
+    job_id = uuid.uuid4().hex
+    pdf_path = _run_job(
+        job_id,
+        profile,
+        generate_translated_pdf,
         req.source_url,
         req.source_lang,
         req.target_lang,
         max_pages=max_pages,
+        job_id=job_id,
     )
     return FileResponse(
         path=pdf_path,
         media_type="application/pdf",
         filename=f"translated_{req.target_lang}.pdf",
+        headers=_job_headers(job_id, profiling.profiling_requested(profile)),
     )
 
 
 @app.get("/pdf-translate-direct")
-def pdf_translate_direct(source_url: str, source_lang: str, target_lang: str, max_pages: int | None = None):
+def pdf_translate_direct(
+    source_url: str,
+    source_lang: str,
+    target_lang: str,
+    max_pages: int | None = None,
+    profile: bool | None = None,
+):
     """
     Endpoint directo para usarlo desde WebView:
     /pdf-translate-direct?source_url=...&source_lang=es&target_lang=en
+    Añade &profile=true para guardar un perfil del job en /jobs/{job_id}/profile.
     """
-    pdf_path = generate_translated_pdf(source_url, source_lang, target_lang, max_pages=max_pages)
+    job_id = uuid.uuid4().hex
+    pdf_path = _run_job(
+        job_id,
+        profile,
+        generate_translated_pdf,
+        source_url,
+        source_lang,
+        target_lang,
+        max_pages=max_pages,
+        job_id=job_id,
+    )
     return FileResponse(
         path=pdf_path,
         media_type="application/pdf",
         filename=f"translated_{target_lang}.pdf",
+        headers=_job_headers(job_id, profiling.profiling_requested(profile)),
     )
 
+@app.post("/pdf-translate-multi")
+def pdf_translate_multi(req: PdfTranslateMultiRequest, max_pages: int | None = None, profile: bool | None = None):
+    """
+    Traduce el mismo PDF a varios idiomas en una sola petición.
+    Devuelve los enlaces de descarga de todos los PDFs generados.
+    """
+    target_langs = [lang for lang in dict.fromkeys(req.target_langs) if lang]
+    if not target_langs:
+        raise HTTPException(status_code=400, detail="target_langs vacío")
+
+    job_id = uuid.uuid4().hex
+    paths = _run_job(
+        job_id,
+        profile,
+        generate_translated_pdfs,
+        req.source_url,
+        req.source_lang,
+        target_langs,
+        job_id,
+        max_pages=max_pages,
+    )
+    result = {
+        "jobId": job_id,
+        "outputs": [
+            {
+                "targetLang": lang,
+                "filename": Path(path).name,
+                "url": f"/outputs/{Path(path).name}",
+            }
+            for lang, path in paths.items()
+        ],
+    }
+    if profiling.profiling_requested(profile):
+        result["profileUrl"] = f"/jobs/{job_id}/profile"
+    return result
+
+
+def _run_preview(
+    job: PreviewJob,
+    cost: JobCost,
+    source_lang: str,
+    target_lang: str,
+    max_pages: int | None,
+) -> None:
+    """Hilo de fondo de /pdf-preview: extrae, y traduce + renderiza página a página."""
+    try:
+        client = _get_lt_client()
+        glossary = _get_glossary()
+        with _admission.admit(cost):
+            layout = get_layout_cached(str(job.source_path))
+            _limit_pages(layout, max_pages)
+            _merge_paragraphs(layout)
+
+            def _translate_page(page: dict) -> None:
+                translate_layout_with_lt(
+                    {"pages": [page]},
+                    source_lang=source_lang,
+                    target_lang=target_lang,
+                    base_url=client.base_url,
+                    api_key=client.api_key,
+                    client=client,
+                    glossary=glossary,
+                )
+
+            _previews.render_job(job, layout, _translate_page)
+    except AdmissionRejected as e:
+        job.fail(e.detail)
+    except Exception as e:
+        job.fail(f"{type(e).__name__}: {e}")
+    finally:
+        job.source_path.unlink(missing_ok=True)
+
+
+@app.post("/pdf-preview")
+def pdf_preview(req: PdfPreviewRequest, max_pages: int | None = None):
+    """
+    Lanza la previsualización de un PDF traducido y responde enseguida.
+    Las páginas se renderizan en orden (la 1 primero) como miniaturas:
+      GET /pdf-preview/{jobId}              -> estado y páginas listas
+      GET /pdf-preview/{jobId}/pages/{n}    -> imagen de la página n (0-based)
+    """
+    if req.format not in available_formats():
+        raise HTTPException(status_code=400, detail=f"format debe ser uno de {available_formats()}")
+    dpi = max(20, min(req.dpi or PREVIEW_DPI, 150))
+
+    with _admission.reserve_slot():
+        job = _previews.create(uuid.uuid4().hex, fmt=req.format, dpi=dpi)
+        try:
+            _download_pdf(req.source_url, job.source_path)
+            cost = estimate_job_cost(str(job.source_path), max_pages=max_pages)
+            _admission.check_job_limits(cost)
+        except Exception as e:
+            job.fail(f"{type(e).__name__}: {e}")
+            job.source_path.unlink(missing_ok=True)
+            raise
+
+    job.pages = cost.pages
+    threading.Thread(
+        target=_run_preview,
+        args=(job, cost, req.source_lang, req.target_lang, max_pages),
+        daemon=True,
+    ).start()
+    return {
+        "jobId": job.job_id,
+        "pages": cost.pages,
+        "statusUrl": f"/pdf-preview/{job.job_id}",
+        "pageUrl": f"/pdf-preview/{job.job_id}/pages/{{page}}",
+    }
+
+
+@app.get("/pdf-preview/{job_id}")
+def pdf_preview_status(job_id: str):
+    job = _previews.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Preview no encontrada")
+    return job.snapshot()
+
+
+@app.get("/pdf-preview/{job_id}/pages/{page}")
+def pdf_preview_page(job_id: str, page: int):
+    if not re.fullmatch(r"[0-9a-f]{32}", job_id) or page < 0:
+        raise HTTPException(status_code=404, detail="Preview no encontrada")
+
+    path = _previews.find_image(job_id, page)
+    if path is None:
+        job = _previews.get(job_id)
+        if job is not None and job.status in ("queued", "running") and (job.pages is None or page < job.pages):
+            # todavía no: el cliente puede volver a pedirla en un momento
+            raise HTTPException(status_code=404, detail="Pagina aun no disponible", headers={"Retry-After": "1"})
+        raise HTTPException(status_code=404, detail="Preview no encontrada")
+
+    # la imagen de una página ya renderizada no cambia
+    return FileResponse(
+        path=str(path),
+        media_type=MEDIA_TYPES[path.suffix.lstrip(".")],
+        headers={"Cache-Control": "private, max-age=3600, immutable"},
+    )
+
+
+@app.post("/text-translate")
+def text_translate(req: TextTranslateRequest, format: str = "ndjson"):
+    """
+    Traduce texto plano largo en el servidor y devuelve el resultado por
+    trozos según van estando listos (en orden), para que la app pinte los
+    primeros párrafos enseguida.
+
+    format=ndjson (default): una línea JSON por trozo
+        {"index": 0, "total": 5, "separator": "", "translatedText": "..."}
+        ... y al final {"done": true, "total": 5}
+    format=sse: los mismos objetos como eventos "data: {...}".
+    Si algo falla a mitad se envía {"error": "..."} y se corta el stream.
+    Cada stream ocupa un hueco de admisión mientras dura (429 si no hay).
+    El cliente reconstruye el texto como separator + translatedText de cada
+    trozo, en orden ("\n\n" entre párrafos, "\n" dentro de un párrafo largo).
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format debe ser ndjson o sse")
+
+    # el texto ya está en memoria: solo aplicamos el límite de tamaño por job
+    _admission.check_job_limits(JobCost(pages=0, chars=len(req.text), memory_mb=0.0))
+
+    client = _get_lt_client()
+    glossary = _get_glossary()
+    segments = split_text_segments(req.text, max_chars=TEXT_SEGMENT_CHARS)
+    separators = [sep for sep, _ in segments]
+    total = len(segments)
+
+    def _encode(obj: dict) -> str:
+        line = json.dumps(obj, ensure_ascii=False)
+        return f"data: {line}\n\n" if format == "sse" else line + "\n"
+
+    def _stream():
+        try:
+            for index, translated in translate_segments_iter(
+                [seg for _, seg in segments],
+                req.source_lang,
+                req.target_lang,
+                client,
+                max_workers=TEXT_TRANSLATE_WORKERS,
+                glossary=glossary,
+            ):
+                yield _encode(
+                    {"index": index, "total": total, "separator": separators[index], "translatedText": translated}
+                )
+        except Exception as e:
+            yield _encode({"error": str(e)})
+            return
+        yield _encode({"done": True, "total": total})
+
+    # el stream ocupa un hilo del pool mientras espera a LibreTranslate: cuenta
+    # contra el mismo cupo que los jobs de PDF (429 si no hay hueco)
+    slot = ExitStack()
+    slot.enter_context(_admission.reserve_slot())
+
+    async def _stream_with_slot():
+        # si el cliente se desconecta Starlette cancela esta tarea: el finally
+        # libera el hueco en ese momento, sin esperar al recolector de basura
+        gen = _stream()
+        try:
+            async for chunk in iterate_in_threadpool(gen):
+                yield chunk
+        finally:
+            gen.close()
+            slot.close()
+
+    stream = _stream_with_slot()
+    # por si la respuesta nunca llega a iterarse
+    weakref.finalize(stream, slot.close)
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream, media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+def _index_document(source_url: str) -> Tuple[str, DocIndex, float | None]:
+    """Descarga el PDF y devuelve (clave, índice, ms de construcción o None si ya existía)."""
+    with _admission.reserve_slot(), tempfile.TemporaryDirectory() as tmpdir:
+        input_path = Path(tmpdir) / "input.pdf"
+        _download_pdf(source_url, input_path)
+
+        key = sha256_file(str(input_path))
+        index = doc_index_store.get(key)
+        if index is not None:
+            return key, index, None
+
+        # la extracción cuenta contra el mismo presupuesto que las traducciones
+        cost = estimate_job_cost(str(input_path))
+        with _admission.admit(cost):
+            layout = get_layout_cached(str(input_path))
+            _merge_paragraphs(layout)
+            index, build_ms = doc_index_store.build(key, layout)
+        return key, index, build_ms
+
+
+@app.post("/doc-index")
+def doc_index(req: DocIndexRequest):
+    """
+    Construye (o reutiliza) el índice BM25 de los bloques del PDF.
+    La documentKey devuelta sirve para /doc-search sin volver a descargar.
+    """
+    key, index, build_ms = _index_document(req.source_url)
+    return {
+        "documentKey": key,
+        "blocks": len(index.units),
+        "buildMs": round(build_ms, 2) if build_ms is not None else None,
+    }
+
+
+@app.post("/doc-search")
+def doc_search(req: DocSearchRequest):
+    """
+    Devuelve los k bloques más relevantes para la pregunta, con su página y
+    bbox, para usarlos como contexto compacto del asistente.
+    """
+    index = doc_index_store.get(req.document_key) if req.document_key else None
+    key = req.document_key
+    if index is None:
+        if not req.source_url:
+            raise HTTPException(status_code=404, detail="Documento no indexado (envia source_url)")
+        key, index, _ = _index_document(req.source_url)
+
+    k = max(1, min(req.k, 50))
+    return {"documentKey": key, "results": index.search(req.question, k=k)}
+
+
+@app.get("/outputs/{filename}")
+def get_output(filename: str):
+    """Descarga un PDF generado previamente (p.ej. por /pdf-translate-multi)."""
+    path = OUTPUTS_DIR / filename
+    if Path(filename).name != filename or not path.is_file():
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+    return FileResponse(path=str(path), media_type="application/pdf", filename=filename)
+
+
+@app.get("/jobs/{job_id}/profile")
+def get_job_profile(job_id: str, format: str = "json"):
+    """
+    Perfil de un job lanzado con profile=true.
+    format=json (resumen: etapas, páginas, latencias LT, top funciones)
+    o format=pstats (volcado de cProfile para snakeviz / pstats).
+    """
+    if not re.fullmatch(r"[0-9a-f]{32}", job_id) or format not in ("json", "pstats"):
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    path = PROFILES_DIR / f"{job_id}.{format}"
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    media_type = "application/json" if format == "json" else "application/octet-stream"
+    return FileResponse(path=str(path), media_type=media_type, filename=path.name)
+
+
 @app.get("/health")
 def health():
     url = _get_any(["LT_URL", "EXPO_PUBLIC_LT_URL"]) or ""
@@ -136,4 +656,5 @@ def health():
         "ok": True,
         "lt_url_present": bool(url),
         "lt_api_key_present": bool(key),
+        "admission": _admission.stats(),
     }
@@ -20,9 +20,10 @@ const colors = {
 
 type Props = {
   contextText: string;
+  sourceUrl?: string;
 };
 
-export function DocAssistantPanel({ contextText }: Props) {
+export function DocAssistantPanel({ contextText, sourceUrl }: Props) {
   const [messages, setMessages] = useState<ChatMessage[]>([]);
   const [input, setInput] = useState('');
   const [loading, setLoading] = useState(false);
@@ -40,6 +41,7 @@ export function DocAssistantPanel({ contextText }: Props) {
         message: userMsg.content,
         contextText,
         history: messages,
+        sourceUrl,
       });
 
       const assistantMsg: ChatMessage = {
@@ -20,18 +20,89 @@ type AskDocAssistantParams = {
   message: string;
   contextText: string;
   history?: ChatMessage[];
+  // URL del PDF: si hay backend, se manda solo el contexto relevante (/doc-search)
+  sourceUrl?: string;
 };
 
+type DocSearchHit = { page: number; blockId: string; bbox: number[]; text: string; score: number };
+
+// documentKey de /doc-index por URL: el PDF se descarga e indexa una sola vez
+// y las preguntas siguientes solo mandan la clave.
+const documentKeys = new Map<string, Promise<string | null>>();
+
+async function indexDocument(base: string, sourceUrl: string): Promise<string | null> {
+  const res = await fetch(`${base}/doc-index`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ source_url: sourceUrl }),
+  });
+  if (!res.ok) return null;
+  const data = await res.json();
+  return data?.documentKey ?? null;
+}
+
+function getDocumentKey(base: string, sourceUrl: string): Promise<string | null> {
+  let key = documentKeys.get(sourceUrl);
+  if (!key) {
+    key = indexDocument(base, sourceUrl).catch(() => null);
+    documentKeys.set(sourceUrl, key);
+    // si falla, no lo recordamos para poder reintentar en la siguiente pregunta
+    key.then((k) => { if (!k) documentKeys.delete(sourceUrl); });
+  }
+  return key;
+}
+
+async function searchDocument(base: string, documentKey: string, question: string): Promise<Response> {
+  return fetch(`${base}/doc-search`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ document_key: documentKey, question, k: 8 }),
+  });
+}
+
+// Pide al backend los bloques más relevantes para la pregunta y los formatea
+// como contexto compacto. Devuelve null si no hay backend o algo falla.
+async function retrieveContext(sourceUrl: string, question: string): Promise<string | null> {
+  const backend = process.env.EXPO_PUBLIC_PDF_BACKEND_URL;
+  if (!backend) return null;
+  const base = backend.replace(/\/+$/, '');
+  try {
+    let key = await getDocumentKey(base, sourceUrl);
+    if (!key) return null;
+    let res = await searchDocument(base, key, question);
+    if (res.status === 404) {
+      // el servidor ya no tiene el índice (reinicio / expulsión LRU): reindexar una vez
+      documentKeys.delete(sourceUrl);
+      key = await getDocumentKey(base, sourceUrl);
+      if (!key) return null;
+      res = await searchDocument(base, key, question);
+    }
+    if (!res.ok) return null;
+    const data = await res.json();
+    const hits: DocSearchHit[] = data?.results ?? [];
+    if (!hits.length) return null;
+    return hits.map((h) => `[page ${h.page + 1}] ${h.text}`).join('\n\n');
+  } catch (e) {
+    console.log('doc-search error', e);
+    return null;
+  }
+}
+
 export async function askDocAssistant({
   message,
   contextText,
   history = [],
+  sourceUrl,
 }: AskDocAssistantParams): Promise<string> {
   const apiKey = process.env.EXPO_PUBLIC_GEMINI_API_KEY;
   if (!apiKey) {
     throw new Error('Missing EXPO_PUBLIC_GEMINI_API_KEY');
   }
 
+  // 0) Contexto: solo los fragmentos relevantes si el backend puede dárnoslos
+  const retrieved = sourceUrl ? await retrieveContext(sourceUrl, message) : null;
+  const context = retrieved ?? contextText;
+
   // 1) Construimos el "chat" en formato Gemini: contents[]
   type GeminiPart = { text: string };
   type GeminiContent = { role: 'user' | 'model'; parts: GeminiPart[] };
@@ -46,7 +117,7 @@ export async function askDocAssistant({
         text:
           SYSTEM_PROMPT +
           '\n\nDocument context (use this as the main source of truth):\n\n' +
-          (contextText || '[NO CONTEXT AVAILABLE]'),
+          (context || '[NO CONTEXT AVAILABLE]'),
       },
     ],
   });
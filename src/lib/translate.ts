@@ -1,27 +1,42 @@
+import { fetch as expoFetch } from 'expo/fetch';
+
+type LtTranslateParams = {
+  text: string;
+  to: string;
+  from?: string;
+  // se llama con el texto traducido acumulado cada vez que llega un trozo
+  onChunk?: (partial: string, index: number, total: number) => void;
+};
+
 export async function ltTranslate({
-  text, to, from = 'auto',
-}: { text: string; to: string; from?: string }) {
+  text, to, from = 'auto', onChunk,
+}: LtTranslateParams) {
+  // Si parece JSON, lo “pretty-print” para introducir saltos de línea y facilitar el chunking
+  const normalized = normalizeTextForChunks(text);
+  if (!normalized) return '';
+
+  // si hay backend, el troceo / caché / paralelismo se hace en el servidor
+  const backend = process.env.EXPO_PUBLIC_PDF_BACKEND_URL;
+  if (backend) {
+    return backendTranslate(backend, { text: normalized, to, from, onChunk });
+  }
+
   const base = process.env.EXPO_PUBLIC_LT_URL!;
   const apiKey = process.env.EXPO_PUBLIC_LT_API_KEY!;
-  // troceo conservador
-  const paras = String(text).split(/\n{2,}/g);
-  const chunks: string[] = [];
-  let box = '';
-  for (const p of paras) {
-    const cand = box ? box + '\n\n' + p : p;
-    if (cand.length > 1800) { if (box) chunks.push(box); box = p; }
-    else box = cand;
+  if (!base || !apiKey) {
+    throw new Error('Missing LT URL or API key. Set EXPO_PUBLIC_LT_URL and EXPO_PUBLIC_LT_API_KEY');
   }
-  if (box) chunks.push(box);
+
+  // Troceo robusto (doble \n → \n → cortes duros por longitud)
+  const chunks = smartChunks(normalized, 1200).filter((c) => c.trim());
 
   const out: string[] = [];
   for (const c of chunks) {
-    if (!c.trim()) continue;
     const body = new URLSearchParams();
     body.set('q', c);
     body.set('source', from);
     body.set('target', to);
-    body.set('format', 'text');
+    body.set('format', 'text'); // para JSON plano también usamos 'text'
     body.set('api_key', apiKey);
 
     const r = await fetch(`${base}/translate`, {
@@ -34,7 +49,135 @@ export async function ltTranslate({
       throw new Error(`LibreTranslate ${r.status} ${msg}`);
     }
     const data = await r.json(); // { translatedText }
-    out.push(data.translatedText ?? '');
+    out.push(data?.translatedText ?? '');
+    onChunk?.(out.join('\n\n'), out.length - 1, chunks.length);
   }
   return out.join('\n\n');
 }
+
+// Detecta JSON y lo formatea con indentación si es posible.
+function normalizeTextForChunks(input: string): string {
+  const trimmed = String(input ?? '').trim();
+  if (!trimmed) return '';
+  try {
+    const looksJson =
+      (trimmed.startsWith('{') && trimmed.endsWith('}')) ||
+      (trimmed.startsWith('[') && trimmed.endsWith(']'));
+    if (looksJson) {
+      const obj = JSON.parse(trimmed);
+      return JSON.stringify(obj, null, 2); // inserta saltos de línea
+    }
+  } catch {
+    // si no parsea, seguimos con el texto tal cual
+  }
+  return trimmed;
+}
+
+// Parte por párrafos dobles, luego por líneas, y si aún excede, corta por longitud fija.
+function smartChunks(input: string, max = 1200): string[] {
+  const first = input.split(/\n{2,}/g);
+  const chunks: string[] = [];
+  for (const block of first) {
+    if (block.length <= max) { chunks.push(block); continue; }
+
+    // dividir por líneas
+    const lines = block.split(/\n/g);
+    let box = '';
+    for (const ln of lines) {
+      const cand = box ? box + '\n' + ln : ln;
+      if (cand.length > max) {
+        if (box) chunks.push(box);
+        if (ln.length > max) {
+          // corte duro dentro de la línea
+          chunks.push(...chunkByLength(ln, max));
+          box = '';
+        } else {
+          box = ln;
+        }
+      } else {
+        box = cand;
+      }
+    }
+    if (box) chunks.push(box);
+  }
+  return chunks;
+}
+
+function chunkByLength(s: string, max: number): string[] {
+  const out: string[] = [];
+  for (let i = 0; i < s.length; i += max) {
+    out.push(s.slice(i, i + max));
+  }
+  return out;
+}
+
+// Usa POST /text-translate del backend, que devuelve NDJSON por trozos:
+// {"index", "total", "separator", "translatedText"} ... {"done": true}
+// El texto se reconstruye como separator + translatedText de cada trozo.
+// Si el stream se corta antes del {"done": true} (o falta algún trozo) se lanza
+// error en vez de devolver una traducción a medias.
+async function backendTranslate(
+  backend: string,
+  { text, to, from = 'auto', onChunk }: LtTranslateParams,
+) {
+  const r = await expoFetch(`${backend.replace(/\/+$/, '')}/text-translate`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ text, source_lang: from, target_lang: to }),
+  });
+  if (!r.ok) {
+    const msg = await r.text().catch(() => '');
+    throw new Error(`Backend translate ${r.status} ${msg}`);
+  }
+
+  const out: string[] = [];
+  let total: number | null = null;
+  const handleLine = (line: string) => {
+    if (!line.trim()) return;
+    const msg = JSON.parse(line);
+    if (msg.error) throw new Error(`Backend translate: ${msg.error}`);
+    if (msg.done) {
+      total = typeof msg.total === 'number' ? msg.total : out.length;
+      return;
+    }
+    if (typeof msg.index === 'number') {
+      const sep = typeof msg.separator === 'string' ? msg.separator : (msg.index ? '\n\n' : '');
+      out[msg.index] = sep + (msg.translatedText ?? '');
+      onChunk?.(out.join(''), msg.index, msg.total);
+    }
+  };
+
+  const finish = () => {
+    if (total === null) {
+      throw new Error('Backend translate: stream ended before completion');
+    }
+    for (let i = 0; i < total; i++) {
+      if (out[i] === undefined) {
+        throw new Error(`Backend translate: missing chunk ${i + 1}/${total}`);
+      }
+    }
+    return out.join('');
+  };
+
+  const reader = r.body?.getReader();
+  if (!reader) {
+    (await r.text()).split('\n').forEach(handleLine);
+    return finish();
+  }
+
+  // leer el stream a medida que llega para mostrar los primeros párrafos ya
+  const decoder = new TextDecoder();
+  let buf = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buf += decoder.decode(value, { stream: true });
+    let nl: number;
+    while ((nl = buf.indexOf('\n')) >= 0) {
+      handleLine(buf.slice(0, nl));
+      buf = buf.slice(nl + 1);
+    }
+  }
+  handleLine(buf + decoder.decode());
+  return finish();
+}